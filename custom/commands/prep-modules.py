@@ -1,59 +1,285 @@
 import logging
+import functools
+import hashlib
 import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http import HTTPStatus
 from ruamel.yaml.comments import CommentedMap as OrderedDict
 import ruamel.yaml
+import yaml
 from pathlib import Path
 
 import click
 import git
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import semver
 from spacemk import load_normalized_data
 from requests_toolbelt.utils import dump as request_dump
-import shutil
+
+# Round-trip YAML engine shared by all modules
+_YAML = ruamel.yaml.YAML()
+_YAML.preserve_quotes = True
+_YAML.indent(mapping=2, sequence=4, offset=2)
+
+# libyaml based dumper, when PyYAML was built with it
+_SAFE_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+def _create_github_session(retry: Retry) -> requests.Session:
+    session = requests.Session()
+    session.headers.update({"Accept": "application/vnd.github+json"})
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+
+    return session
+
+# Shared sessions so that connections to the GitHub API are kept alive and reused across calls.
+# Reads are retried with backoff when rate limited or on transient errors.
+_GH_SESSION = _create_github_session(
+    Retry(
+        backoff_factor=0.5,
+        raise_on_status=False,
+        respect_retry_after_header=True,
+        status_forcelist=[429, 502, 503, 504],
+        total=5,
+    )
+)
+
+# POST requests, such as opening a pull request, are not idempotent, so only retry when the request was never
+# processed: neither on read errors nor on gateway errors, as GitHub may have already handled the request.
+_GH_POST_SESSION = _create_github_session(
+    Retry(
+        allowed_methods=["POST"],
+        backoff_factor=0.5,
+        connect=5,
+        other=0,
+        raise_on_status=False,
+        read=0,
+        respect_retry_after_header=True,
+        status_forcelist=[429],
+        total=5,
+    )
+)
+
+# Limit the number of concurrent clones and fetches, so that they do not saturate the network
+# when many modules are processed concurrently
+_GIT_NETWORK_SEMAPHORE = threading.Semaphore(4)
+
+# Release-please workflow copied to every module repository
+_WORKFLOW_TEMPLATE_FILE = Path(Path(__file__).parent, "../misc/release-please-tf.yaml").resolve()
+
+# Latest tag per repository and probed file contents, along with the ETag of the response they were read from
+_ETAG_CACHE_PATH = Path(Path(__file__).parent, "../../data/.github_etag_cache.json").resolve()
+_ETAG_CACHE_LOCK = threading.Lock()
+_etag_cache = None
+_etag_cache_dirty = False
+
+def _get_cached_tag(key: str) -> dict | None:
+    global _etag_cache  # noqa: PLW0603
+
+    with _ETAG_CACHE_LOCK:
+        if _etag_cache is None:
+            _etag_cache = {}
+            if _ETAG_CACHE_PATH.exists():
+                try:
+                    with _ETAG_CACHE_PATH.open("r", encoding="utf-8") as file:
+                        _etag_cache = json.load(file)
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Could not read ETag cache '{_ETAG_CACHE_PATH}': {e}. Ignoring.")
+
+        return _etag_cache.get(key)
+
+def _set_cached_tag(key: str, entry: dict) -> None:
+    global _etag_cache_dirty  # noqa: PLW0603
+
+    # The cache is only updated in memory, and saved once by _save_etag_cache()
+    with _ETAG_CACHE_LOCK:
+        _etag_cache[key] = entry
+        _etag_cache_dirty = True
+
+def _save_etag_cache() -> None:
+    global _etag_cache_dirty  # noqa: PLW0603
+
+    with _ETAG_CACHE_LOCK:
+        if not _etag_cache_dirty:
+            return
+
+        # Replace the cache file atomically, so that an interrupted run does not leave a corrupt cache behind
+        tmp_cache_path = _ETAG_CACHE_PATH.with_name(f"{_ETAG_CACHE_PATH.name}.tmp")
+        _ETAG_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_cache_path.open("w", encoding="utf-8") as file:
+            json.dump(_etag_cache, file, indent=2, sort_keys=True)
+        tmp_cache_path.replace(_ETAG_CACHE_PATH)
+        _etag_cache_dirty = False
+
+def _pick_latest_tag(tags: list) -> dict:
+    """Pick the tag with the highest version, falling back to the first tag if none is a valid version"""
+    versioned_tags = []
+    for tag in tags:
+        try:
+            versioned_tags.append(
+                (semver.Version.parse(tag.get("name").removeprefix("v"), optional_minor_and_patch=True), tag)
+            )
+        except ValueError:
+            continue
+
+    if not versioned_tags:
+        return tags[0]
+
+    return max(versioned_tags, key=lambda item: item[0])[1]
 
 def get_latest_tag(endpoint: str, github_api_token: str, namespace: str, repository: str) -> dict:
     data = {}
 
     headers = {
-        "Accept": "application/vnd.github+json",
         "Authorization": f"Bearer {github_api_token}",
     }
 
+    # Replay the ETag of the previous response so that GitHub can answer with a "304 Not Modified",
+    # which has no body and does not count against the rate limit
+    cache_key = f"{namespace}/{repository}"
+    cached = _get_cached_tag(cache_key)
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
     try:
-        url = f"{endpoint}/repos/{namespace}/{repository}/tags?per_page=5"
-        response = requests.get(headers=headers, url=url)
+        url = f"{endpoint}/repos/{namespace}/{repository}/tags?per_page=100"
+        response = _GH_SESSION.get(headers=headers, url=url)
         logging.debug(request_dump.dump_all(response).decode("utf-8"))
         response.raise_for_status()
     except requests.exceptions.HTTPError as e:
         raise RuntimeError(f"HTTP Error: {e}") from e
 
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        logging.debug(f"Tags for '{cache_key}' have not changed since the last run")
+        data[cached["tag_name"]] = cached["sha"]
+        return data
+
     tags = response.json()
     if not tags:
         return None
     
-    # Get the first tag (most recent)
-    tag = tags[0]
+    # A single page of 100 tags (the maximum allowed) is enough to find the latest version
+    tag = _pick_latest_tag(tags)
     tag_name = tag.get("name").removeprefix("v")
     data[tag_name] = tag["commit"]["sha"]
+
+    if response.headers.get("ETag"):
+        _set_cached_tag(cache_key, {"etag": response.headers.get("ETag"), "tag_name": tag_name, "sha": data[tag_name]})
+
+    return data
+
+def _get_graphql_endpoint(endpoint: str) -> str:
+    # GitHub Enterprise serves the REST API under /api/v3 and the GraphQL API under /api/graphql
+    if endpoint.endswith("/api/v3"):
+        return endpoint.removesuffix("/v3") + "/graphql"
+
+    return f"{endpoint}/graphql"
+
+def get_latest_tags_bulk(endpoint: str, github_api_token: str, repos: list) -> dict:
+    """
+    Get the latest tag of many repositories using aliased GraphQL queries.
+
+    Args:
+        endpoint (str): GitHub API endpoint
+        github_api_token (str): GitHub API token
+        repos (list): List of (namespace, repository) tuples
+
+    Returns:
+        dict: Mapping of (namespace, repository) to the same {tag_name: sha} dict that get_latest_tag returns,
+              or None if the repository has no tags. Repositories that could not be queried are omitted.
+    """
+    data = {}
+    chunk_size = 100
+
+    headers = {
+        "Authorization": f"Bearer {github_api_token}",
+    }
+
+    repos = list(dict.fromkeys(repos))
+    for chunk_start in range(0, len(repos), chunk_size):
+        chunk = repos[chunk_start:chunk_start + chunk_size]
+
+        variable_definitions = []
+        fields = []
+        variables = {}
+        for index, (namespace, repository) in enumerate(chunk):
+            variable_definitions.append(f"$owner{index}: String!, $name{index}: String!")
+            fields.append(
+                f"r{index}: repository(owner: $owner{index}, name: $name{index}) {{ "
+                'refs(refPrefix: "refs/tags/", first: 100, orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) { '
+                "nodes { name target { oid ... on Tag { target { oid } } } } } }"
+            )
+            variables[f"owner{index}"] = namespace
+            variables[f"name{index}"] = repository
+
+        query = f"query GetLatestTags({', '.join(variable_definitions)}) {{ {' '.join(fields)} }}"
+
+        try:
+            response = _GH_POST_SESSION.post(
+                headers=headers,
+                json={"query": query, "variables": variables},
+                url=_get_graphql_endpoint(endpoint),
+            )
+            logging.debug(request_dump.dump_all(response).decode("utf-8"))
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"Could not get tags in bulk: {e}. Falling back to one request per module.")
+            continue
+
+        payload = response.json()
+        for error in payload.get("errors") or []:
+            logging.warning(f"GitHub GraphQL API error: {error.get('message')}")
+
+        results = payload.get("data") or {}
+        for index, (namespace, repository) in enumerate(chunk):
+            result = results.get(f"r{index}")
+            if result is None:
+                continue
+
+            tags = []
+            for node in result["refs"]["nodes"]:
+                # Annotated tags point to a tag object, which in turn points to the commit
+                target = node["target"]
+                sha = target["target"]["oid"] if target.get("target") else target["oid"]
+                tags.append({"name": node["name"], "commit": {"sha": sha}})
+
+            if not tags:
+                data[(namespace, repository)] = None
+                continue
+
+            tag = _pick_latest_tag(tags)
+            tag_name = tag.get("name").removeprefix("v")
+            data[(namespace, repository)] = {tag_name: tag["commit"]["sha"]}
+
     return data
 
-def checkout_repository(endpoint: str, github_api_token: str, namespace: str, repository: str, tag: str, modules_dir: str) -> str:
+def checkout_repository(
+    endpoint: str,
+    github_api_token: str,
+    namespace: str,
+    repository: str,
+    modules_dir: str,
+) -> tuple[str, git.Repo]:
     """
     Checkout a GitHub repository using GitPython.
     If the repository is already cloned, fetch updates instead.
+
+    The tip of the default branch is checked out rather than the latest tag, as the configuration changes
+    are committed on top of it and submitted as a pull request.
     
     Args:
         endpoint (str): GitHub API endpoint
         github_api_token (str): GitHub API token
         namespace (str): Repository namespace/owner
         repository (str): Repository name
-        tag (str): Tag to checkout
         modules_dir (str): Directory to store modules
         
     Returns:
-        str: Path to the cloned/updated repository
+        tuple[str, git.Repo]: Path to the cloned/updated repository, and the repository itself
     """
     # Create a temporary directory for the repository
     repo_dir = Path(modules_dir) / repository
@@ -82,16 +308,21 @@ def checkout_repository(endpoint: str, github_api_token: str, namespace: str, re
             except ValueError:
                 origin = repo.create_remote("origin", repo_url)
             
-            # Fetch latest changes
-            origin.fetch()
+            # Fetch latest changes. Only the tip of the branch is needed to update the configuration.
+            with _GIT_NETWORK_SEMAPHORE:
+                origin.fetch(depth=1, no_tags=True)
             repo.git.checkout()
         else:
             # Clone the repository
             logging.info(f"Cloning repository {namespace}/{repository} to {repo_dir}")
-            repo = git.Repo.clone_from(repo_url, repo_dir)
+            # Shallow clone of the default branch, as the history and the tags are not needed
+            with _GIT_NETWORK_SEMAPHORE:
+                repo = git.Repo.clone_from(
+                    repo_url, repo_dir, multi_options=["--depth=1", "--single-branch", "--no-tags"]
+                )
             repo.git.checkout()
         
-        return str(repo_dir)
+        return str(repo_dir), repo
     except git.GitCommandError as e:
         logging.error(f"Git error: {e}")
         raise RuntimeError(f"Failed to clone/update repository: {e}") from e
@@ -114,7 +345,7 @@ def create_pull_request(owner: str, repository: str, title: str, description: st
         "base": base_branch,
     }
 
-    r = requests.post(
+    r = _GH_POST_SESSION.post(
         git_pulls_api,
         headers=headers,
         data=json.dumps(payload)
@@ -123,6 +354,93 @@ def create_pull_request(owner: str, repository: str, title: str, description: st
     if not r.ok:
         print("Request Failed: {0}".format(r.text))
 
+def _get_file_content(endpoint: str, github_api_token: str, namespace: str, repository: str, path: str) -> bytes | None:
+    """Get the content of a file on the default branch through the contents API, or None if it does not exist"""
+    headers = {
+        "Accept": "application/vnd.github.raw+json",
+        "Authorization": f"Bearer {github_api_token}",
+    }
+
+    cache_key = f"{namespace}/{repository}:{path}"
+    cached = _get_cached_tag(cache_key)
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
+    url = f"{endpoint}/repos/{namespace}/{repository}/contents/{path}"
+    response = _GH_SESSION.get(headers=headers, url=url)
+    logging.debug(request_dump.dump_all(response).decode("utf-8"))
+
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        return cached["content"].encode("utf-8")
+
+    if response.status_code == HTTPStatus.NOT_FOUND:
+        return None
+
+    response.raise_for_status()
+
+    if response.headers.get("ETag"):
+        _set_cached_tag(cache_key, {"etag": response.headers.get("ETag"), "content": response.text})
+
+    return response.content
+
+def is_module_up_to_date(
+    endpoint: str,
+    github_api_token: str,
+    namespace: str,
+    repository: str,
+    latest_tag_version: str,
+) -> bool:
+    """
+    Check through the GitHub API whether a module repository already has the expected Spacelift configuration,
+    so that it does not need to be cloned.
+
+    Args:
+        endpoint (str): GitHub API endpoint
+        github_api_token (str): GitHub API token
+        namespace (str): Repository namespace/owner
+        repository (str): Repository name
+        latest_tag_version (str): The latest tag version
+
+    Returns:
+        bool: True if no changes are needed, False otherwise or if the repository could not be probed
+    """
+    try:
+        config_content = _get_file_content(endpoint, github_api_token, namespace, repository, ".spacelift/config.yml")
+        if config_content is None:
+            return False
+
+        config = yaml.safe_load(config_content) or {}
+        if str(config.get("module_version")) != latest_tag_version:
+            return False
+
+        legacy_workflow_content = _get_file_content(
+            endpoint, github_api_token, namespace, repository, ".github/workflows/release-please.yaml"
+        )
+        if legacy_workflow_content is not None:
+            return False
+
+        if not _WORKFLOW_TEMPLATE_FILE.exists():
+            return True
+
+        workflow_content = _get_file_content(
+            endpoint, github_api_token, namespace, repository, ".github/workflows/release-please-tf.yaml"
+        )
+        _, template_digest = _read_template(_WORKFLOW_TEMPLATE_FILE)
+
+        return workflow_content is not None and _digest(workflow_content) == template_digest
+    except (requests.exceptions.RequestException, yaml.YAMLError, AttributeError) as e:
+        logging.debug(f"Could not probe '{namespace}/{repository}' through the API: {e}")
+        return False
+
+def _digest(content: bytes) -> bytes:
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+@functools.lru_cache(maxsize=None)
+def _read_template(path: Path) -> tuple[bytes, bytes]:
+    """Read a template file once, returning its content and digest"""
+    content = path.read_bytes()
+    return content, _digest(content)
+
 def update_spacelift_config(module_name: str, latest_tag_data: dict, repo_dir: str = None):
     """
     Check if .spacelift/config.yml exists and update the module_version element.
@@ -141,10 +459,6 @@ def update_spacelift_config(module_name: str, latest_tag_data: dict, repo_dir: s
         return False
         
     changes_made = False
-    
-    yaml = ruamel.yaml.YAML()
-    yaml.preserve_quotes = True
-    yaml.indent(mapping=2, sequence=4, offset=2)
 
     # Get the latest tag name (first key in the dictionary)
     latest_tag_version = next(iter(latest_tag_data))
@@ -153,44 +467,49 @@ def update_spacelift_config(module_name: str, latest_tag_data: dict, repo_dir: s
     config_file = config_dir / "config.yml"
 
     # Create .spacelift directory if it doesn't exist
-    if not os.path.exists(config_dir):
-        os.makedirs(config_dir)
-        logging.info(f"Created directory '{config_dir}'")
-
-    # Create .spacelift directory if it doesn't exist
-    if not config_dir.exists():
-        os.makedirs(config_dir)
-        logging.info(f"Created directory '{config_dir}'")
+    config_dir.mkdir(parents=True, exist_ok=True)
 
     # Check if config.yml exists
-    if config_file.exists():
-        # Read existing config
+    config_exists = config_file.exists()
+    if not config_exists:
+        # There is no formatting to preserve in a new file, so use the faster libyaml emitter
+        logging.info(f"Creating new config file '{config_file}'")
+        try:
+            with config_file.open("w") as file:
+                yaml.dump(
+                    {"version": "1", "module_version": latest_tag_version},
+                    file,
+                    Dumper=_SAFE_DUMPER,
+                    default_flow_style=False,
+                    sort_keys=False,
+                )
+            logging.info(f"Updated module_version to '{latest_tag_version}' in '{config_file}'")
+            changes_made = True
+        except Exception:
+            logging.exception(f"Error writing to {config_file}")
+    else:
+        # Read existing config, preserving its formatting
         try:
             with open(config_file, 'r') as file:
-                config_data = file.read()
-                config = yaml.load(config_data)
+                config = _YAML.load(file)
         except Exception as e:
             logging.error(f"Error reading {config_file}: {e}")
             config = OrderedDict()
-    else:
-        # Create new config
-        config = OrderedDict()
-        config['version'] = "1"
-        logging.info(f"Creating new config file '{config_file}'")
 
-    # Update module_version
-    config['module_version'] = latest_tag_version
-    
-    # Write updated config
-    try:
-        # Check if file exists and if content would change
-        if not config_file.exists() or config.get('module_version') != latest_tag_version:
-            with open(config_file, 'w') as file:
-                yaml.dump(config, file)
-            logging.info(f"Updated module_version to '{latest_tag_version}' in '{config_file}'")
-            changes_made = True
-    except Exception as e:
-        logging.error(f"Error writing to {config_file}: {e}")
+        # Update module_version
+        previous_tag_version = config.get('module_version')
+        config['module_version'] = latest_tag_version
+
+        # Write updated config
+        try:
+            # Check if content would change
+            if previous_tag_version != latest_tag_version:
+                with open(config_file, 'w') as file:
+                    _YAML.dump(config, file)
+                logging.info(f"Updated module_version to '{latest_tag_version}' in '{config_file}'")
+                changes_made = True
+        except Exception as e:
+            logging.error(f"Error writing to {config_file}: {e}")
 
     github_worfklow_dir = Path(repo_dir) / ".github/workflows"
     tf_workflow_file = github_worfklow_dir / "release-please-tf.yaml"
@@ -204,10 +523,11 @@ def update_spacelift_config(module_name: str, latest_tag_data: dict, repo_dir: s
     os.makedirs(github_worfklow_dir, exist_ok=True)
 
     # Copy release-please workflow template to the repository
-    template_file = Path(os.path.dirname(__file__), '../misc/release-please-tf.yaml').resolve()
+    template_file = _WORKFLOW_TEMPLATE_FILE
     if template_file.exists():
-        if not tf_workflow_file.exists() or not os.path.samefile(template_file, tf_workflow_file):
-            shutil.copy2(template_file, tf_workflow_file)
+        template_content, template_digest = _read_template(template_file)
+        if not tf_workflow_file.exists() or _digest(tf_workflow_file.read_bytes()) != template_digest:
+            tf_workflow_file.write_bytes(template_content)
             logging.info(f"Copied release-please workflow template to '{tf_workflow_file}'")
             changes_made = True
     else:
@@ -215,26 +535,55 @@ def update_spacelift_config(module_name: str, latest_tag_data: dict, repo_dir: s
         
     return changes_made
 
-def commit_changes(repo_dir: str, module_name: str, latest_tag_version: str, namespace: str, repository: str, github_api_token: str) -> bool :
+def _wait_for_branch(endpoint: str, github_api_token: str, namespace: str, repository: str, branch_name: str) -> bool:
+    """Wait for a freshly pushed branch to be visible through the GitHub API, backing off exponentially"""
+    headers = {
+        "Authorization": f"Bearer {github_api_token}",
+    }
+    url = f"{endpoint}/repos/{namespace}/{repository}/branches/{branch_name}"
+
+    delay = 0.05
+    for _ in range(10):
+        if _GH_SESSION.get(headers=headers, url=url).ok:
+            return True
+
+        time.sleep(delay)
+        delay *= 2
+
+    logging.warning(f"Branch '{branch_name}' is still not visible on '{namespace}/{repository}'")
+    return False
+
+def commit_changes(
+    repo: git.Repo,
+    module_name: str,
+    latest_tag_version: str,
+    namespace: str,
+    repository: str,
+    github_api_token: str,
+    endpoint: str = "https://api.github.com",
+) -> bool:
     """
     Commit changes made to the module repository.
     
     Args:
-        repo_dir (str): Path to the repository directory
+        repo (git.Repo): The module repository
         module_name (str): The name of the module
         latest_tag_version (str): The latest tag version
+        namespace (str): Repository namespace/owner
+        repository (str): Repository name
+        github_api_token (str): GitHub API token
+        endpoint (str): GitHub API endpoint
     
     Returns:
         bool: True if commit was successful, False otherwise
     """
     try:
         branch_name = "spacelift-migration"
-        repo = git.Repo(repo_dir)
         
         current_branch = repo.active_branch
         
         # Check if there are changes to commit
-        if not repo.is_dirty(untracked_files=True):
+        if not repo.git.status("--porcelain", "-z", untracked_files="all"):
             logging.info(f"No changes to commit for module '{module_name}'")
             return False
         
@@ -248,7 +597,7 @@ def commit_changes(repo_dir: str, module_name: str, latest_tag_version: str, nam
         commit_message = f"chore: update Spacelift configuration for version {latest_tag_version}"
         repo.git.commit('-m', commit_message)
         repo.git.push("origin", '-u', branch_name)
-        time.sleep(1)
+        _wait_for_branch(endpoint, github_api_token, namespace, repository, branch_name)
         
         create_pull_request(owner=namespace, 
                             repository=repository,
@@ -267,56 +616,217 @@ def commit_changes(repo_dir: str, module_name: str, latest_tag_version: str, nam
         logging.error(f"Error committing changes: {e}")
         return False
 
+def _load_module_state(modules_path: Path) -> dict:
+    """Load the tag SHA last processed for each module, keyed by namespace/repository"""
+    state_file = Path(modules_path, ".state.json")
+    if not state_file.exists():
+        return {}
+
+    try:
+        with state_file.open("r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read modules state '{state_file}': {e}. Ignoring.")
+        return {}
+
+def _record_module_state(modules_path: Path, module_state: dict, key: str, sha: str) -> None:
+    """Record the tag SHA processed for a module, replacing the state file atomically"""
+    state_file = Path(modules_path, ".state.json")
+    tmp_state_file = Path(modules_path, ".state.json.tmp")
+
+    module_state[key] = sha
+
+    with tmp_state_file.open("w", encoding="utf-8") as file:
+        json.dump(module_state, file, indent=2, sort_keys=True)
+    tmp_state_file.replace(state_file)
+
+def _checkout_module(module: dict, config: dict, modules_path: Path, latest_tags: dict, module_state: dict) -> dict:
+    """
+    Look up the latest tag of a module and checkout its repository.
+
+    Args:
+        module (dict): Module data
+        config (dict): Configuration
+        modules_path (Path): Directory to store modules
+        latest_tags (dict): Latest tags looked up in bulk, keyed by (namespace, repository)
+        module_state (dict): Tag SHA last processed for each module, keyed by namespace/repository
+
+    Returns:
+        dict: Result record with the module name and its status. Checked out modules also include
+              the latest tag information and the repository directory, and up to date modules the tag SHA.
+    """
+    result = {"name": module.get("name"), "status": "skipped"}
+
+    if module.get("vcs.repository") is None:
+        logging.warning(f"Module '{module.get('name')}' has no repository information. Skipping")
+        return result
+
+    repo_key = (module.get("vcs.namespace"), module.get("vcs.repository"))
+    if repo_key in latest_tags:
+        latest_tag_data = latest_tags[repo_key]
+    else:
+        latest_tag_data = get_latest_tag(
+            endpoint=config.get("github.endpoint", "https://api.github.com"),
+            github_api_token=config.get("github.api_token"),
+            namespace=module.get("vcs.namespace"),
+            repository=module.get("vcs.repository"),
+        )
+
+    if not latest_tag_data:
+        logging.warning(f"No tags found for module '{module.get('name')}'. Skipping")
+        return result
+
+    # Get the latest tag name (first key in the dictionary)
+    latest_tag_version = next(iter(latest_tag_data))
+    latest_tag_sha = latest_tag_data[latest_tag_version]
+
+    # Nothing to do if the tag has not moved since the module was last processed
+    state_key = f"{module.get('vcs.namespace')}/{module.get('vcs.repository')}"
+    if module_state.get(state_key) == latest_tag_sha:
+        logging.info(f"Module '{module.get('name')}' is unchanged since the last run. Skipping")
+        result["status"] = "unchanged"
+        return result
+
+    # Cloning is only needed when the configuration has to change
+    if is_module_up_to_date(
+        endpoint=config.get("github.endpoint", "https://api.github.com"),
+        github_api_token=config.get("github.api_token"),
+        namespace=module.get("vcs.namespace"),
+        repository=module.get("vcs.repository"),
+        latest_tag_version=latest_tag_version,
+    ):
+        logging.info(f"Module '{module.get('name')}' already has the latest Spacelift configuration. Skipping")
+        result.update({"latest_tag_sha": latest_tag_sha, "state_key": state_key, "status": "up_to_date"})
+        return result
+
+    # Checkout the repository
+    repo_dir, repo = checkout_repository(
+        endpoint=config.get("github.endpoint", "https://api.github.com"),
+        github_api_token=config.get("github.api_token"),
+        namespace=module.get("vcs.namespace"),
+        repository=module.get("vcs.repository"),
+        modules_dir=modules_path
+    )
+
+    result.update(
+        {
+            "latest_tag_data": latest_tag_data,
+            "latest_tag_sha": latest_tag_sha,
+            "latest_tag_version": latest_tag_version,
+            "repo": repo,
+            "repo_dir": repo_dir,
+            "state_key": state_key,
+            "status": "checked_out",
+        }
+    )
+
+    return result
+
+def _finalize_module(module: dict, checkout: dict, config: dict, modules_path: Path, module_state: dict) -> dict:
+    """
+    Update the Spacelift configuration of a checked out module and commit the changes.
+
+    Args:
+        module (dict): Module data
+        checkout (dict): Result record returned by _checkout_module
+        config (dict): Configuration
+        modules_path (Path): Directory to store modules
+        module_state (dict): Tag SHA last processed for each module, keyed by namespace/repository
+
+    Returns:
+        dict: Result record with the module name and its status
+    """
+    result = {"name": module.get("name"), "status": "prepared"}
+
+    # Update .spacelift/config.yml with the latest tag
+    changes_made = update_spacelift_config(module.get("name"), checkout["latest_tag_data"], checkout["repo_dir"])
+
+    # Commit changes if any were made
+    if changes_made:
+        commit_success = commit_changes(checkout["repo"], module.get("name"),
+                                        checkout["latest_tag_version"],
+                                        namespace=module.get("vcs.namespace"),
+                                        repository=module.get("vcs.repository"),
+                                        github_api_token=config.get("github.api_token"),
+                                        endpoint=config.get("github.endpoint", "https://api.github.com"))
+        if not commit_success:
+            return result
+
+        logging.info(f"Successfully committed changes to module '{module.get('name')}'")
+        result["status"] = "committed"
+
+    _record_module_state(modules_path, module_state, checkout["state_key"], checkout["latest_tag_sha"])
+
+    return result
+
 @click.command(help="Prepare modules.")
 @click.decorators.pass_meta_key("config")
 def prepare_modules(config):
+    try:
+        _prepare_modules(config)
+    finally:
+        # Entries added during the run are saved at once, even if some modules failed
+        _save_etag_cache()
+
+
+def _prepare_modules(config):
     data = load_normalized_data()
 
     current_file_path = Path(__file__).parent.resolve()
     modules_path = Path(current_file_path, f"../../data/modules").resolve()
     os.makedirs(modules_path, exist_ok=True)
 
+    latest_tags = get_latest_tags_bulk(
+        endpoint=config.get("github.endpoint", "https://api.github.com"),
+        github_api_token=config.get("github.api_token"),
+        repos=[
+            (module.get("vcs.namespace"), module.get("vcs.repository"))
+            for module in data.get("modules")
+            if module.get("vcs.repository") is not None
+        ],
+    )
+
+    module_state = _load_module_state(modules_path)
+
+    # Only process the modules whose latest tag moved since they were last processed
+    modules = []
     for module in data.get("modules"):
-        if module.get("vcs.repository") is None:
-            logging.warning(f"Module '{module.get('name')}' has no repository information. Skipping")
+        repo_key = (module.get("vcs.namespace"), module.get("vcs.repository"))
+        latest_tag_data = latest_tags.get(repo_key)
+        if latest_tag_data and module_state.get(f"{repo_key[0]}/{repo_key[1]}") == next(iter(latest_tag_data.values())):
             continue
 
-        latest_tag_data = get_latest_tag(
-            endpoint=config.get("github.endpoint", "https://api.github.com"),
-            github_api_token=config.get("github.api_token"),
-            namespace=module.get("vcs.namespace"),
-            repository=module.get("vcs.repository"),
-        )
-        
-        if not latest_tag_data:
-            logging.warning(f"No tags found for module '{module.get('name')}'. Skipping")
-            continue
-            
-        # Get the latest tag name (first key in the dictionary)
-        latest_tag_version = next(iter(latest_tag_data))
-        
-        # Checkout the repository
-        repo_dir = checkout_repository(
-            endpoint=config.get("github.endpoint", "https://api.github.com"),
-            github_api_token=config.get("github.api_token"),
-            namespace=module.get("vcs.namespace"),
-            repository=module.get("vcs.repository"),
-            tag=f"{latest_tag_version}",
-            modules_dir=modules_path
-        )
-        
-        # Update .spacelift/config.yml with the latest tag
-        changes_made = update_spacelift_config(module.get("name"), latest_tag_data, repo_dir)
-        
-        # Commit changes if any were made
-        if changes_made:
-            commit_success = commit_changes(repo_dir, module.get("name"), 
-                                            latest_tag_version, 
-                                            namespace=module.get("vcs.namespace"), 
-                                            repository=module.get("vcs.repository"), 
-                                            github_api_token=config.get("github.api_token"))
-            if commit_success:
-                logging.info(f"Successfully committed changes to module '{module.get('name')}'")
-        
-                                
-        logging.info(f"Successfully prepared module '{module.get('name')}'")
+        modules.append(module)
+
+    if not modules:
+        logging.info("All modules are unchanged since the last run. Nothing to do")
+        return
+
+    # Tag lookups and checkouts run in a pool, while the main thread updates and commits
+    # each module as soon as it is checked out, overlapping the two phases.
+    # Clones and fetches are further limited by _GIT_NETWORK_SEMAPHORE.
+    failed_modules = []
+    with ThreadPoolExecutor(max_workers=config.get("github.max_workers", 8)) as executor:
+        futures = {
+            executor.submit(_checkout_module, module, config, modules_path, latest_tags, module_state): module
+            for module in modules
+        }
+
+        for future in as_completed(futures):
+            module = futures[future]
+            try:
+                result = future.result()
+                if result["status"] == "checked_out":
+                    result = _finalize_module(module, result, config, modules_path, module_state)
+                elif result["status"] == "up_to_date":
+                    _record_module_state(modules_path, module_state, result["state_key"], result["latest_tag_sha"])
+            except Exception:
+                logging.exception(f"Failed to prepare module '{module.get('name')}'")
+                failed_modules.append(module.get("name"))
+                continue
+
+            if result["status"] in ("prepared", "committed"):
+                logging.info(f"Successfully prepared module '{result['name']}'")
+
+    if failed_modules:
+        raise RuntimeError(f"Failed to prepare modules: {', '.join(failed_modules)}")
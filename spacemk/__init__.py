@@ -1,3 +1,4 @@
+import functools
 import json
 import logging
 import subprocess
@@ -37,7 +38,7 @@ def ensure_folder_exists(path: Path | str) -> None:
 
     if not path.exists():
         logging.debug(f"Creating the '{path}' folder")
-        path.mkdir(parents=True)
+        path.mkdir(parents=True, exist_ok=True)
     else:
         logging.debug(f"The '{path}' folder already exists. Skipping creation.")
 
@@ -69,13 +70,26 @@ def is_command_available(command: str | list[str], execute: bool = False) -> boo
     return which(command) is not None
 
 
+@functools.lru_cache(maxsize=1)
+def _load_json_file(path: Path, mtime_ns: int, size: int) -> dict:  # noqa: ARG001
+    return json.loads(path.read_bytes())
+
+
 def load_normalized_data() -> dict:
+    """Load the normalized data
+
+    The parsed data is cached until the file changes, so repeated calls do not parse it again.
+    The returned data is shared between calls and must not be modified: callers that change it should copy
+    the part they change first.
+    """
     path = Path(get_tmp_folder(), "data.json")
-    with path.open("r", encoding="utf-8") as fp:
-        return benedict(json.load(fp))
+    stat = path.stat()
+
+    return benedict(_load_json_file(path, stat.st_mtime_ns, stat.st_size))
 
 
 def save_normalized_data(data: dict, path: str = "data.json") -> None:
     path = Path(get_tmp_folder(), path)
-    with path.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, indent=2, sort_keys=True)
+
+    # Serializing to a string first writes the file at once, instead of one small chunk per JSON token
+    path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
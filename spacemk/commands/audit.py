@@ -13,5 +13,5 @@ from spacemk.exporters import load_exporter
 )
 @pass_meta_key("config")
 def audit(config):
-    exporter = load_exporter(config=config.get("exporter", {}))
-    exporter.audit()
+    with load_exporter(config=config.get("exporter", {})) as exporter:
+        exporter.audit()
@@ -1,14 +1,13 @@
 import base64
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import click
 
 from spacemk import load_normalized_data
 from spacemk.spacelift import Spacelift
 
-
-def _create_context(spacelift: Spacelift, space_id: str, token: str, tfc_address: str):
-    mutation = """
+_CREATE_CONTEXT_MUTATION = """
 mutation CreateContextV2($input: ContextInput!) {
     contextCreateV2(input: $input) {
         id,
@@ -17,7 +16,28 @@ mutation CreateContextV2($input: ContextInput!) {
 }
 """
 
-    script = """
+_UPDATE_CONTEXT_MUTATION = """
+mutation UpdateContext($id: ID!, $name: String!, $description: String, $labels: [String!], $space: ID) {
+  contextUpdateV2(
+    id: $id
+    input: {name: $name, description: $description, labels: $labels, space: $space}
+  ) {
+    id
+    name
+    __typename
+  }
+}
+"""
+
+_DELETE_CONTEXT_MUTATION = """
+mutation DeleteContextForContextList($id: ID!) {
+  contextDelete(id: $id) {
+    id
+  }
+}
+"""
+
+_IMPORT_STATE_SCRIPT = """
 #!/bin/bash
 set -euo pipefail
 
@@ -59,6 +79,11 @@ echo "Using Binary: $binary"
 $binary state push -force state.tfstate
 """
 
+# The script is the same for every context, so it is only encoded once
+_IMPORT_STATE_SCRIPT_B64 = base64.b64encode(_IMPORT_STATE_SCRIPT.encode()).decode()
+
+
+def _create_context(spacelift: Spacelift, space_id: str, token: str, tfc_address: str):
     variables = {
         "input": {
             "description": "",
@@ -85,7 +110,7 @@ $binary state push -force state.tfstate
                     "description": "",
                     "id": "import-state-from-tf.sh",
                     "type": "FILE_MOUNT",
-                    "value": base64.b64encode(script.encode()).decode(),
+                    "value": _IMPORT_STATE_SCRIPT_B64,
                     "writeOnly": False,
                 },
             ],
@@ -106,7 +131,7 @@ $binary state push -force state.tfstate
     }
 
     logging.info(f"Creating context for space '{space_id}'")
-    spacelift.call_api(operation=mutation, variables=variables)
+    spacelift.call_api(operation=_CREATE_CONTEXT_MUTATION, variables=variables)
 
 
 def _delete_context(spacelift: Spacelift, space_id: str):
@@ -114,18 +139,6 @@ def _delete_context(spacelift: Spacelift, space_id: str):
 
     logging.info(f"Deleting context for space '{space_id}'")
 
-    update_context_mutation = """
-mutation UpdateContext($id: ID!, $name: String!, $description: String, $labels: [String!], $space: ID) {
-  contextUpdateV2(
-    id: $id
-    input: {name: $name, description: $description, labels: $labels, space: $space}
-  ) {
-    id
-    name
-    __typename
-  }
-}
-"""
     update_context_variables = {
         "id": context_id,
         "name": f"SMK Terraform Token-{space_id}",
@@ -133,46 +146,79 @@ mutation UpdateContext($id: ID!, $name: String!, $description: String, $labels:
         "space": space_id,
         "labels": [],  # Remove the autoattach label
     }
-    spacelift.call_api(operation=update_context_mutation, variables=update_context_variables)
+    spacelift.call_api(operation=_UPDATE_CONTEXT_MUTATION, variables=update_context_variables)
 
-    delete_context_mutation = """
-mutation DeleteContextForContextList($id: ID!) {
-  contextDelete(id: $id) {
-    id
-  }
-}
-"""
     delete_context_variables = {"id": context_id}
-    spacelift.call_api(operation=delete_context_mutation, variables=delete_context_variables)
+    spacelift.call_api(operation=_DELETE_CONTEXT_MUTATION, variables=delete_context_variables)
 
 
-def _get_space_ids(spacelift: Spacelift) -> list:
+def _get_spaces(spacelift: Spacelift) -> dict:
     query = """
 query GetSpaces {
   spaces {
     id
+    inheritEntities
+    parentSpace
   }
 }
 """
 
     response = spacelift.call_api(operation=query)
 
-    return [space.id for space in response.get("data.spaces")]
+    return {space.get("id"): space for space in response.get("data.spaces")}
 
-def _get_stack(spacelift: Spacelift, stack_id: str) -> list:
-    query = """
-query GetStack($id: ID!) {
-  stack(id: $id) {
-    id
-		name
-		space
-  }
-}
+
+def _find_shared_space(spaces: dict, space_ids: set) -> str | None:
+    """Find the deepest space whose contexts are visible from all the given spaces
+
+    Returns:
+        str | None: Space ID, or None if the given spaces do not share any
+    """
+    shared_space_ids = None
+
+    for space_id in space_ids:
+        # Stacks see the contexts of their space, and of its ancestors for as long as spaces inherit entities
+        visible_space_ids = [space_id]
+        space = spaces.get(space_id)
+        while space and space.get("inheritEntities") and space.get("parentSpace"):
+            visible_space_ids.append(space.get("parentSpace"))
+            space = spaces.get(space.get("parentSpace"))
+
+        if shared_space_ids is None:
+            shared_space_ids = visible_space_ids
+        else:
+            shared_space_ids = [id_ for id_ in shared_space_ids if id_ in visible_space_ids]
+
+    return shared_space_ids[0] if shared_space_ids else None
+
+def _get_stacks(spacelift: Spacelift, stack_ids: list[str]) -> dict:
+    """Get many stacks at once, using one aliased GraphQL query per chunk of stacks
+
+    Returns:
+        dict: Stacks keyed by ID, with None for stacks that could not be found
+    """
+    chunk_size = 100
+    stacks = {}
+
+    for chunk_start in range(0, len(stack_ids), chunk_size):
+        chunk = stack_ids[chunk_start:chunk_start + chunk_size]
+
+        variable_definitions = ", ".join(f"$id{index}: ID!" for index in range(len(chunk)))
+        fields = "\n".join(f"  s{index}: stack(id: $id{index}) {{ id name space }}" for index in range(len(chunk)))
+        query = f"""
+query GetStacks({variable_definitions}) {{
+{fields}
+}}
 """
 
-    response = spacelift.call_api(operation=query, variables={"id": stack_id})
+        response = spacelift.call_api(
+            operation=query, variables={f"id{index}": stack_id for index, stack_id in enumerate(chunk)}
+        )
+
+        for index, stack_id in enumerate(chunk):
+            stacks[stack_id] = response.get(f"data.s{index}")
 
-    return response.get("data.stack")
+    return stacks
 
 
 def _trigger_task(spacelift: Spacelift, stack_id: str, workspace_id: str) -> None:
@@ -190,29 +236,61 @@ def import_state_files_to_spacelift(config):
 
     # We only want to create a context for the spaces that are referenced in the stacks
     space_ids = set()
-    for stack in data.get("stacks"):
-        stack = _get_stack(spacelift=spacelift, stack_id=stack.slug)
-        if stack is None:
-            logging.Error(f"Stack '{stack.slug}' not found in Spacelift.")
+    spacelift_stacks = _get_stacks(spacelift=spacelift, stack_ids=[stack.slug for stack in data.get("stacks")])
+    for stack_id, spacelift_stack in spacelift_stacks.items():
+        if spacelift_stack is None:
+            logging.error(f"Stack '{stack_id}' not found in Spacelift.")
             raise click.Abort()
-        space_ids.add(stack.space)
+        space_ids.add(spacelift_stack.get("space"))
 
     api_endpoint = config.exporter.settings.api_endpoint
     if api_endpoint is None:
         api_endpoint = "https://app.terraform.io"
 
+    # A single context is enough when all the stacks can see the space it is created in.
+    # The context auto-attaches to all the stacks that can see that space, so it is only consolidated
+    # when that space already holds migrated stacks. Otherwise, the token would be exposed to unrelated stacks,
+    # for example by creating the context in the root space.
+    if len(space_ids) > 1:
+        shared_space_id = _find_shared_space(spaces=_get_spaces(spacelift=spacelift), space_ids=space_ids)
+        if shared_space_id in space_ids:
+            space_ids = {shared_space_id}
+        else:
+            logging.info("Stacks do not share one of their spaces, creating one context per space")
+
     for space_id in space_ids:
         # Create a Context with the TFC/TFE token that auto-attaches to all stacks
+        logging.info(f"Creating the context with the TFC/TFE token in space '{space_id}'")
         _create_context(spacelift=spacelift, space_id=space_id, token=config.exporter.settings.api_token,
                         tfc_address=api_endpoint)
 
-    for stack in data.get("stacks"):
-        stack_id = stack.slug
-        workspace_id = stack._source_id  # noqa: SLF001
+    # Trigger runs that pull the state file from TFC/TFE and push it to Spacelift.
+    # Runs mostly wait on Spacelift, so they are dispatched concurrently.
+    failed_stack_ids = []
+    with ThreadPoolExecutor(max_workers=config.get("spacelift.trigger_concurrency", 10)) as executor:
+        futures = {
+            executor.submit(
+                _trigger_task,
+                spacelift=spacelift,
+                stack_id=stack.slug,
+                workspace_id=stack._source_id,  # noqa: SLF001
+            ): stack.slug
+            for stack in data.get("stacks")
+        }
 
-        # Trigger a run that pulls the state file from TFC/TFE and pushes it to Spacelift
-        _trigger_task(spacelift=spacelift, stack_id=stack_id, workspace_id=workspace_id)
+        for future in as_completed(futures):
+            stack_id = futures[future]
+            try:
+                future.result()
+            except Exception:
+                logging.exception(f"Failed to import the state file for stack '{stack_id}'")
+                failed_stack_ids.append(stack_id)
+            else:
+                logging.info(f"Imported the state file for stack '{stack_id}'")
 
     for space_id in space_ids:
         # Delete the Context with the TFC/TFE token that auto-attaches to all stacks
         _delete_context(spacelift=spacelift, space_id=space_id)
+
+    if failed_stack_ids:
+        raise RuntimeError(f"Failed to import the state files for stacks: {', '.join(sorted(failed_stack_ids))}")
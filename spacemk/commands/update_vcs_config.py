@@ -1,3 +1,4 @@
+import copy
 import csv
 import logging
 from pathlib import Path
@@ -43,7 +44,9 @@ def update_vcs_config(vcs_config_file_path: str):
     save_normalized_data(data, Path(get_tmp_folder(), "data.bak.json"))
     vcs_config = load_vcs_config(vcs_config_file_path)
 
-    for stack in data.get("stacks"):
+    # The loaded data is shared, so only the stacks that are changed are copied
+    stacks = copy.deepcopy(data.get("stacks"))
+    for stack in stacks:
         stack_vcs_config = find_stack_vcs_config(stack.get("name"), vcs_config)
         if not stack_vcs_config:
             logging.warning(f"No VCS configuration found for the '{stack.get('name')}' stack. Skipping.")
@@ -66,4 +69,4 @@ def update_vcs_config(vcs_config_file_path: str):
 
         stack.vcs.update(new_vcs_config)
 
-    save_normalized_data(data)
+    save_normalized_data({**data, "stacks": stacks})
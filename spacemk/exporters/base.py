@@ -21,6 +21,12 @@ class BaseExporter(ABC):
         """
         self._config = config
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
     def _check_data(self, data: dict) -> dict:
         """Check source provider data and add warnings as needed
 
@@ -156,8 +162,9 @@ class BaseExporter(ABC):
                 flatten_entity_type_data.append(entity_data.flatten(separator="."))
 
             if len(flatten_entity_type_data) > 0:
+                # Entities without a property (e.g. no warnings) get an empty cell, keeping the rows aligned
                 pivoted_entity_type_data = {
-                    k: [dic[k] for dic in flatten_entity_type_data if k in dic]
+                    k: [dic.get(k) for dic in flatten_entity_type_data]
                     for k in reduce(set.union, [set(d.keys()) for d in flatten_entity_type_data])
                 }
 
@@ -191,6 +198,10 @@ class BaseExporter(ABC):
 
         logging.info("Stop auditing data")
 
+    def close(self) -> None:
+        """Release the resources held by the exporter, such as HTTP connections"""
+        logging.debug("No resources to release")
+
     def export(self) -> None:
         """Export data from the source provider and map it to Spacelift entitty types"""
         logging.info("Start exporting data")
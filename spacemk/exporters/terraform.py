@@ -1,24 +1,175 @@
-# ruff: noqa: PERF401
+import functools
 import json
 import logging
 import os
+import random
 import re
 import time
+import types
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from http import HTTPStatus
 from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import click
-import pydash
 import requests
 import semver
 from benedict import benedict
 from python_on_whales import Container, docker
+from python_on_whales.exceptions import NoSuchContainer
+from requests.adapters import HTTPAdapter
 from requests_toolbelt.utils import dump as request_dump
 from slugify import slugify
+from urllib3.util import Retry
 
 from spacemk import get_tmp_subfolder, is_command_available
 from spacemk.exporters import BaseExporter
 
+# Shared, read-only result for responses without content (e.g. 204 HTTP status code)
+_EMPTY_RESPONSE = types.MappingProxyType({})
+
+
+def _is_valid_variable_name(name: str) -> bool:
+    """Check whether a name only has letters, digits and underscores, and does not start with a digit"""
+    # ASCII identifiers are exactly those names, and checking them is cheaper than matching a regex
+    return name.isascii() and name.isidentifier()
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_include_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+def _delete_keypath(data: dict, keypath: str) -> None:
+    """Delete a property from nested dicts in place, ignoring missing properties"""
+    *parent_keys, key = keypath.split(".")
+    for parent_key in parent_keys:
+        data = data.get(parent_key)
+        if not isinstance(data, dict):
+            return
+
+    data.pop(key, None)
+
+
+def _get_keypath(data: dict, keys: tuple[str, ...]) -> object:
+    """Read a property from nested dicts, returning None for missing properties"""
+    for key in keys:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+
+    return data
+
+
+def _set_keypath(data: dict, keys: tuple[str, ...], value: object) -> None:
+    """Write a property to nested dicts, creating the intermediate dicts as needed"""
+    *parent_keys, key = keys
+    for parent_key in parent_keys:
+        if not isinstance(data.get(parent_key), dict):
+            data[parent_key] = {}
+        data = data[parent_key]
+
+    data[key] = value
+
+
+def _as_dict(data: dict) -> dict:
+    """Unwrap a benedict, so that properties can be read without parsing keypaths"""
+    return data.dict() if isinstance(data, benedict) else data
+
+
+def _parse_vcs_identifier(identifier: str | None, provider: str | None) -> tuple[str | None, str | None]:
+    """Split a VCS repository identifier into its namespace and repository name"""
+    if not identifier:
+        return None, None
+
+    segments = identifier.split("/")
+    if provider == "gitlab":
+        # GitLab namespaces can be nested groups
+        return "/".join(segments[:-1]), segments[-1]
+
+    if provider == "azure_devops":
+        # Azure DevOps identifiers look like "<organization>/<project>/_git/<repository>"
+        return segments[1], segments[3]
+
+    return segments[0], segments[1]
+
+
+def _project_resources(
+    raw_data: list[dict], include_regex: re.Pattern, property_keys: tuple[tuple[str, ...], ...]
+) -> list[dict]:
+    """Keep the requested properties of the resources whose name, if any, matches the include regex"""
+    data = []
+    for raw_datum in raw_data:
+        name = (raw_datum.get("attributes") or {}).get("name")
+        if name and include_regex.match(name) is None:
+            continue
+
+        if property_keys:
+            datum = {}
+            for keys in property_keys:
+                _set_keypath(datum, keys, _get_keypath(raw_datum, keys))
+            data.append(datum)
+
+    return data
+
+
+def _build_page_url(url: str, page_number: int, page_size: int | None) -> str:
+    """Build the URL of a page of results, keeping the other query parameters"""
+    parsed_url = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parsed_url.query) if not key.startswith("page[")]
+    query.append(("page[number]", str(page_number)))
+    if page_size:
+        query.append(("page[size]", str(page_size)))
+
+    return urlunsplit(parsed_url._replace(query=urlencode(query)))
+
+
+@functools.lru_cache(maxsize=None)
+def _has_container_runtime() -> tuple[bool, bool]:
+    """Check once whether Docker and Podman are available, as each check runs a subprocess"""
+    return is_command_available(["docker", "ps"], execute=True), is_command_available(["podman", "ps"], execute=True)
+
+
+@functools.lru_cache(maxsize=None)
+def _classify_terraform_version(version: str) -> tuple[str, str]:
+    """Map a workspace Terraform version to a stack version and workflow tool
+
+    Workspaces share a handful of versions, so each one is only parsed once.
+    """
+    if version == "latest":
+        # KLUDGE: Stick to the latest MPL-licensed Terraform version for now
+        return "1.5.7", "TERRAFORM_FOSS"
+
+    if version.startswith(("~", "^")) or semver.match(version, ">1.5.7"):
+        return version, "OPEN_TOFU"
+
+    return version, "TERRAFORM_FOSS"
+
+
+@functools.lru_cache(maxsize=None)
+def _generate_migration_id_cached(args: tuple[str, ...]) -> str:
+    # The same IDs are referenced by many entities, and slugifying is relatively costly
+    return slugify("_".join(args)).replace("-", "_")
+
+
+# Terraform versions at or above this one are flagged as BSL (1.5.7 itself is the last MPL release)
+_BSL_MIN = semver.Version.parse("1.5.7")
+
+
+@functools.lru_cache(maxsize=None)
+def _check_for_bsl_terraform(version: str) -> tuple[bool, str | None]:
+    # Ensure version is not pessimistic
+    if version.startswith("~") or version.startswith("^"):
+        # lets just default to true so we catch this during a migration.
+        # This can almost certainly be overridden.
+        return True, "Pessimistic version, unable to determine if it's BSL Terraform"
+
+    if version == "latest" or semver.Version.parse(version) >= _BSL_MIN:
+        return True, None
+    return False, None
+
 
 class TerraformExporterPlanError(Exception):
     def __init__(self, organization_id: str, workspace_id: str):
@@ -42,12 +193,50 @@ class TerraformExporter(BaseExporter):
             }
         }
 
+        # Keep connections to the Terraform API alive and reuse them across calls,
+        # retrying with backoff when rate limited or on transient errors
+        retry = Retry(
+            backoff_factor=0.5,
+            raise_on_status=False,
+            respect_retry_after_header=True,
+            status_forcelist=[429, 500, 502, 503, 504],
+            total=5,
+        )
+        self._session = requests.Session()
+        self._session.headers.update(
+            {
+                "Authorization": f"Bearer {self._config.get('api_token')}",
+                "Content-Type": "application/vnd.api+json",
+            }
+        )
+        # Extraction runs up to `concurrency` collections at once, each fetching up to 4 pages at once,
+        # so the pool is sized so that connections are kept rather than discarded
+        pool_maxsize = max(64, self._config.get("concurrency", 16) * 4)
+        self._session.mount(
+            "http://", HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=pool_maxsize)
+        )
+        self._session.mount(
+            "https://", HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=pool_maxsize)
+        )
+
+        # State file download URLs, keyed by state version ID, as included when listing workspaces
+        self._state_download_urls = {}
+
+        # Plans that reached a terminal state, keyed by ID
+        self._terminal_plans = {}
+
+        # Raw workspace variables, keyed by workspace ID, as included when listing workspaces
+        self._included_workspace_variables = {}
+
         self.is_gitlab = False
         self.is_ado = False
         self.experimental_support_variable_sets = self._config.get("experimental_support_variable_sets", False)
         if self.experimental_support_variable_sets:
             logging.warning("Experimental support for variable sets is enabled")
 
+    def close(self) -> None:
+        self._session.close()
+
     def _build_stack_slug(self, workspace: dict) -> str:
         return slugify(workspace.get("attributes.name"))
 
@@ -57,20 +246,18 @@ class TerraformExporter(BaseExporter):
         drop_response_properties: list | None = None,
         method: str = "GET",
         request_data: dict | None = None,
+        return_benedict: bool = True,
     ) -> dict:
         logging.debug(f"Start calling API: {url}")
 
-        headers = {
-            "Authorization": f"Bearer {self._config.get('api_token')}",
-            "Content-Type": "application/vnd.api+json",
-        }
-
         try:
             if request_data is not None:
-                request_data = json.dumps(request_data)
+                request_data = json.dumps(request_data, separators=(",", ":"))
 
-            response = requests.request(data=request_data, headers=headers, method=method, url=url)
-            logging.debug(request_dump.dump_all(response).decode("utf-8"))
+            response = self._session.request(data=request_data, method=method, url=url)
+            # Dumping the request and response is costly, only do it if it is going to be logged
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(request_dump.dump_all(response).decode("utf-8"))
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
             # Return None for non-existent API endpoints as we are most likely interacting with an older TFE version
@@ -86,14 +273,21 @@ class TerraformExporter(BaseExporter):
         except requests.exceptions.RequestException as e:
             raise RuntimeError(f"Error for {url}") from e
 
+        if response.status_code == HTTPStatus.NO_CONTENT or len(response.content) == 0:
+            logging.debug("Stop calling API")
+            return _EMPTY_RESPONSE
+
+        # Parse the raw bytes directly, skipping the decoding to text
+        data = json.loads(response.content)
+
         if drop_response_properties:
             # Drop properties, mostly when they contain the keypath separator benedict uses (ie ".")
-            data = benedict(pydash.omit(response.json(), drop_response_properties))
-        elif len(response.content) == 0:
-            # The response has no content (e.g. 204 HTTP status code)
-            data = benedict()
-        else:
-            data = benedict(response.json())
+            for property_ in drop_response_properties:
+                _delete_keypath(data, property_)
+
+        # Wrapping the data to enable keypaths walks all of it, so only do it when the caller needs keypaths
+        if return_benedict:
+            data = benedict(data)
 
         logging.debug("Stop calling API")
 
@@ -115,13 +309,14 @@ class TerraformExporter(BaseExporter):
     def _check_agent_pools_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking agent pools data")
 
-        for key, item in enumerate(data):
+        for item in data:
             warnings = []
 
             if item.get("attributes.agent-count") == 0:
                 warnings.append("No agents")
 
-            data[key]["warnings"] = ", ".join(warnings)
+            if warnings:
+                item["warnings"] = ", ".join(warnings)
 
         logging.info("Stop checking agent pools data")
 
@@ -130,13 +325,14 @@ class TerraformExporter(BaseExporter):
     def _check_modules_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking modules data")
 
-        for key, item in enumerate(data):
+        for item in data:
             warnings = []
 
             if item.get("attributes.status") != "setup_complete":
                 warnings.append("Setup incomplete")
 
-            data[key]["warnings"] = ", ".join(warnings)
+            if warnings:
+                item["warnings"] = ", ".join(warnings)
 
         logging.info("Stop checking modules data")
 
@@ -145,14 +341,15 @@ class TerraformExporter(BaseExporter):
     def _check_policies_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking policies data")
 
-        for key, item in enumerate(data):
+        for item in data:
             warnings = []
 
             # Older Terraform Enterprise versions only supported Sentinel policies
             if not item.get("attributes.kind") or item.get("attributes.kind") == "sentinel":
                 warnings.append("Sentinel policy")
 
-            data[key]["warnings"] = ", ".join(warnings)
+            if warnings:
+                item["warnings"] = ", ".join(warnings)
 
         logging.info("Stop checking policies data")
 
@@ -162,7 +359,8 @@ class TerraformExporter(BaseExporter):
         """Check if the exporter requirements are met"""
         logging.info("Start checking requirements")
 
-        if not is_command_available(["docker", "ps"], execute=True) and not is_command_available(["podman", "ps"], execute=True):
+        docker_ok, podman_ok = _has_container_runtime()
+        if not (docker_ok or podman_ok):
             logging.warning("Both Docker and Podman are not available. Sensitive variables will not be retrieved.")
 
             click.confirm("Do you want to continue?", abort=True)
@@ -172,14 +370,14 @@ class TerraformExporter(BaseExporter):
     def _check_workspace_variables_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking workspace variables data")
 
-        prog = re.compile("^[a-zA-Z_]+[a-zA-Z0-9_]*$")
-        for key, item in enumerate(data):
+        for item in data:
             warnings = []
 
-            if not re.search(prog, item.get("attributes.key")):
+            if not _is_valid_variable_name(item.get("attributes.key") or ""):
                 warnings.append("Key is an invalid env var name")
 
-            data[key]["warnings"] = ", ".join(warnings)
+            if warnings:
+                item["warnings"] = ", ".join(warnings)
 
         logging.info("Stop checking workspace variables data")
 
@@ -188,18 +386,7 @@ class TerraformExporter(BaseExporter):
     def _check_workspaces_data(self, data: list[dict]) -> list[dict]:
         logging.info("Start checking workspaces data")
 
-        def check_for_bsl_terraform(version):
-            # Ensure version is not pessimistic
-            if version.startswith("~") or version.startswith("^"):
-                # lets just default to true so we catch this during a migration.
-                # This can almost certainly be overridden.
-                return True, "Pessimistic version, unable to determine if it's BSL Terraform"
-
-            if version == "latest" or semver.match(version, ">=1.5.7"):
-                return True, None
-            return False, None
-
-        for key, item in enumerate(data):
+        for item in data:
             warnings = []
 
             if item.get("attributes.resource-count") == 0:
@@ -208,13 +395,14 @@ class TerraformExporter(BaseExporter):
             if item.get("attributes.vcs-repo.service-provider") is None:
                 warnings.append("No VCS configuration")
 
-            bsl, warning = check_for_bsl_terraform(item.get("attributes.terraform-version"))
+            bsl, warning = _check_for_bsl_terraform(item.get("attributes.terraform-version"))
             if bsl:
                 warnings.append("BSL Terraform version")
             if warning is not None:
                 warnings.append(warning)
 
-            data[key]["warnings"] = ", ".join(warnings)
+            if warnings:
+                item["warnings"] = ", ".join(warnings)
 
         logging.info("Stop checking workspaces data")
 
@@ -276,14 +464,48 @@ class TerraformExporter(BaseExporter):
         with Path(log_path_on_disk).open(mode="r") as f:
             return f.read()
 
-    def _download_text_file(self, url: str) -> str:
+    def _iter_log_lines_from_disk(self, id_: str) -> Iterator[str]:
+        """Iterate over the lines of a log, without holding the whole log in memory"""
+        log_path_on_disk = f"/tmp/spacelift-migration-kit/{id_}.txt"
+        logging.info(f"Reading log lines from '{log_path_on_disk}'")
+        with Path(log_path_on_disk).open(mode="r") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+    def _download_text_file(self, url: str, dest_path: Path | None = None) -> str | None:
         logging.info("Start downloading text file")
 
-        headers = {
-            "Authorization": f"Bearer {self._config.get('api_token')}",
-        }
-        response = requests.get(allow_redirects=True, headers=headers, url=url)
-        logging.debug(request_dump.dump_all(response).decode("utf-8"))
+        # Downloads are not API calls, so the session content type does not apply
+        headers = {"Content-Type": None}
+
+        if dest_path is not None:
+            # Stream the file to a temporary path, then rename it,
+            # so that a failed or partial download never leaves a file behind
+            tmp_path = dest_path.with_name(f"{dest_path.name}.part")
+            try:
+                with self._session.get(allow_redirects=True, headers=headers, stream=True, url=url) as response:
+                    logging.debug(
+                        f"Downloaded '{url}' with status code {response.status_code} and headers {response.headers}"
+                    )
+                    response.raise_for_status()
+
+                    with tmp_path.open("wb") as fp:
+                        for chunk in response.iter_content(chunk_size=1 << 16):
+                            fp.write(chunk)
+
+                tmp_path.replace(dest_path)
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"Could not download '{url}': {e}") from e
+            finally:
+                tmp_path.unlink(missing_ok=True)
+
+            logging.info("Stop downloading text file")
+
+            return None
+
+        response = self._session.get(allow_redirects=True, headers=headers, url=url)
+        # Files can be large, so their content is not logged
+        logging.debug(f"Downloaded '{url}' with status code {response.status_code} and headers {response.headers}")
 
         logging.info("Stop downloading text file")
 
@@ -292,9 +514,18 @@ class TerraformExporter(BaseExporter):
     def _download_state_files(self, data: dict) -> None:
         logging.info("Start downloading state files")
 
-        for workspace in data.get("workspaces"):
-            state_version_id = workspace.get("relationships.current-state-version.data.id")
-            if state_version_id:
+        # Downloads are bound by network latency, so they are run concurrently
+        with ThreadPoolExecutor(max_workers=self._config.get("download_concurrency", 16)) as executor:
+            list(executor.map(self._download_one_state, data.get("workspaces")))
+
+        logging.info("Stop downloading state files")
+
+    def _download_one_state(self, workspace: dict) -> None:
+        state_version_id = workspace.get("relationships.current-state-version.data.id")
+        if state_version_id:
+            # Older TFE versions may not include the state versions when listing workspaces
+            download_url = self._state_download_urls.get(state_version_id)
+            if download_url is None:
                 state_version_data = self._extract_data_from_api(
                     drop_response_properties=[
                         "data.attributes.modules",
@@ -304,49 +535,19 @@ class TerraformExporter(BaseExporter):
                     path=f"/state-versions/{state_version_id}",
                     properties=["attributes.hosted-state-download-url"],
                 )
+                download_url = state_version_data[0].get("attributes.hosted-state-download-url")
 
-                state_file_content = self._download_text_file(
-                    url=state_version_data[0].get("attributes.hosted-state-download-url")
-                )
-
-                # KLUDGE: The Terraform API response is returned a "application/octet-stream"
-                # and includes encoded unicode characters that need to be decoded before saving the state file
-                state_file_content = json.dumps(json.loads(state_file_content), indent=2)
+            organization_id = workspace.get("relationships.organization.data.id")
+            workspace_id = workspace.get("id")
 
-                organization_id = workspace.get("relationships.organization.data.id")
-                workspace_id = workspace.get("id")
+            # The state file is valid JSON as returned by the API, so it is saved as is
+            path = Path(get_tmp_subfolder(f"state-files/{organization_id}"), f"{workspace_id}.tfstate")
+            logging.debug(f"Saving state file for '{organization_id}/{workspace_id}' to '{path}'")
+            self._download_text_file(url=download_url, dest_path=path)
 
-                path = Path(get_tmp_subfolder(f"state-files/{organization_id}"), f"{workspace_id}.tfstate")
-                with path.open("w", encoding="utf-8") as fp:
-                    logging.debug(f"Saving state file for '{organization_id}/{workspace_id}' to '{path}'")
-                    fp.write(state_file_content)
-
-        logging.info("Stop downloading state files")
-
-    def _enrich_variable_set_data(self, data: dict) -> dict: # noqa: PLR0912, PLR0915
-        def reset_variable_set_relationships(var_set_id: str, variable_set_relationship_backup: dict) -> None:
-
-            request = {}
-            if variable_set_relationship_backup.get("relationships.workspaces.data") is not None:
-                request["workspaces"] = {"data": variable_set_relationship_backup.get("relationships.workspaces.data")}
-            if variable_set_relationship_backup.get("relationships.projects.data") is not None:
-                request["projects"] = {"data": variable_set_relationship_backup.get("relationships.projects.data")}
-
-            self._extract_data_from_api(
-                method="PATCH",
-                path=f"/varsets/{var_set_id}",
-                request_data={
-                    "data": {
-                        "attributes": {
-                            "priority": variable_set_relationship_backup.get("attributes.priority"),
-                            "global": variable_set_relationship_backup.get("attributes.global"),
-                        },
-                        "relationships": request
-                    }
-                }
-            )
-
-        if not is_command_available(["docker", "ps"], execute=True) and not is_command_available(["podman", "ps"], execute=True):
+    def _enrich_variable_set_data(self, data: dict) -> dict:
+        docker_ok, podman_ok = _has_container_runtime()
+        if not (docker_ok or podman_ok):
             logging.warning("Both Docker and Podman are not available. Skipping enriching workspace variables data.")
             return data
 
@@ -358,6 +559,46 @@ class TerraformExporter(BaseExporter):
 
         logging.info("Start enriching variable_set data")
 
+        # Group variable sets by organization, and variables by variable set
+        varsets_by_org = defaultdict(list)
+        for variable_set in data.get("variable_sets"):
+            varsets_by_org[variable_set.get("relationships.organization.data.id")].append(variable_set)
+
+        vars_by_varset = defaultdict(list)
+        for var in data.get("variable_set_variables"):
+            vars_by_varset[var.get("relationships.varset.data.id")].append(var)
+
+        # Organizations are independent, each one gets its own agent and workspace, and their variable sets do not
+        # overlap, so they are enriched concurrently
+        errors = []
+        with ThreadPoolExecutor(max_workers=self._config.get("org_concurrency", 4)) as executor:
+            futures = {
+                executor.submit(
+                    self._enrich_variable_set_for_org,
+                    organization,
+                    varsets_by_org[organization.get("id")],
+                    vars_by_varset,
+                ): organization.get("id")
+                for organization in data.get("organizations")
+            }
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.exception(f"Failed to enrich variable sets for organization '{futures[future]}'")
+                    errors.append(e)
+
+        logging.info("Stop enriching variable_set data")
+
+        if errors:
+            raise errors[0]
+
+        return data
+
+    def _enrich_variable_set_for_org(  # noqa: PLR0912, PLR0915
+        self, organization: dict, variable_sets: list[dict], vars_by_varset: dict
+    ) -> None:
         new_workspace = None
         variable_set_relationship_backup = None
         var_set_reset = True
@@ -366,201 +607,197 @@ class TerraformExporter(BaseExporter):
         agent_pool_id = None
 
         try:
-            for organization in data.get("organizations"):
-                # Get Default Project
-                projects = self._extract_data_from_api(
-                    path=f"/organizations/{organization.get('id')}/projects",
-                    properties=[
-                        "id",
-                        "attributes.name"
-                    ],
-                )
+            # Get Default Project
+            projects = self._extract_data_from_api(
+                path=f"/organizations/{organization.get('id')}/projects",
+                properties=[
+                    "id",
+                    "attributes.name"
+                ],
+            )
 
-                default_project_id = None
-                for project in projects:
-                    if project.get("attributes.name") == "Default Project":
-                        default_project_id = project.get("id")
+            default_project_id = None
+            for project in projects:
+                if project.get("attributes.name") == "Default Project":
+                    default_project_id = project.get("id")
 
-                logging.info(f"Start local TFC/TFE agent for organization '{organization.get('id')}'")
-                agent_pool_id = self._create_agent_pool(organization_id=organization.get("id"))
-                agent_container_name = f"smk-tfc-agent-{organization.get('id')}"
-                agent_container = self._start_agent_container(
-                    agent_pool_id=agent_pool_id, container_name=agent_container_name
-                )
-                # Store the container ID in case it gets stopped and we need it for the error message
-                agent_container_id = agent_container.id
+            logging.info(f"Start local TFC/TFE agent for organization '{organization.get('id')}'")
+            agent_pool_id = self._create_agent_pool(organization_id=organization.get("id"))
+            agent_container_name = f"smk-tfc-agent-{organization.get('id')}"
+            agent_container = self._start_agent_container(
+                agent_pool_id=agent_pool_id, container_name=agent_container_name
+            )
+            # Store the container ID in case it gets stopped and we need it for the error message
+            agent_container_id = agent_container.id
+
+            # Create a workspace
+            new_workspace = self._extract_data_from_api(
+                method="POST",
+                path=f"/organizations/{organization.get('id')}/workspaces",
+                properties=["id"],
+                request_data={
+                    "data": {
+                        "relationships": {
+                            "project": {
+                                "data": {
+                                    "id": default_project_id,
+                                    "type": "projects"
+                                }
+                            }
+                        },
+                        "attributes": {
+                            "name": "SMK",
+                            "execution-mode": "remote",
+                        },
+                        "type": "workspaces",
+                    }
+                },
+            )[0]
 
-                # Create a workspace
-                new_workspace = self._extract_data_from_api(
-                    method="POST",
-                    path=f"/organizations/{organization.get('id')}/workspaces",
-                    properties=["id"],
+            # Push arbitrary data to the workspace
+            push = docker.run(
+                detach=False,
+                envs={
+                    "ORG": organization.get("attributes.name"),
+                },
+                image=self._config.get("push_image", "ghcr.io/spacelift-io/terraform-push:latest"),
+                pull="always",
+                remove=True,
+                volumes={
+                    (f"{os.environ['HOME']}/.terraform.d/", "/root/.terraform.d/"),
+                }
+            )
+            logging.info(push)
+
+            #Update workspace to use the TFC agent
+            self._extract_data_from_api(
+                method="PATCH",
+                path=f"/workspaces/{new_workspace.get('id')}",
+                request_data={
+                    "data": {
+                        "attributes": {
+                            "agent-pool-id": agent_pool_id,
+                            "execution-mode": "agent",
+                            "setting-overwrites": {"execution-mode": True, "agent-pool": True},
+                        },
+                        "type": "workspaces",
+                    }
+                },
+            )
+
+            for var_set in variable_sets:
+                var_set_id = var_set.get("id")
+
+                # Backup variable attachment info
+                variable_set_relationship_backup = self._extract_data_from_api(
+                    path=f"/varsets/{var_set_id}",
+                    properties=[
+                        "attributes.name",
+                        "attributes.global",
+                        "attributes.priority",
+                        "relationships.workspaces.data",
+                        "relationships.projects.data",
+                        "relationships.organizations.data"
+                    ],
+                )[0]
+
+                logging.info(f"Updating {var_set_id} to attach to the workspace {new_workspace.get('id')}")
+                var_set_reset = False
+                # Add Var Set to only the new workspace and set it as priority
+                self._extract_data_from_api(
+                    method="PATCH",
+                    path=f"/varsets/{var_set_id}",
                     request_data={
                         "data": {
-                            "relationships": {
-                                "project": {
-                                    "data": {
-                                        "id": default_project_id,
-                                        "type": "projects"
-                                    }
-                                }
-                            },
                             "attributes": {
-                                "name": "SMK",
-                                "execution-mode": "remote",
+                                "global": False,
+                                "priority": True,
                             },
-                            "type": "workspaces",
+                            "relationships": {
+                                "workspaces": {
+                                    "data": [
+                                        {
+                                            "id": new_workspace.get("id"),
+                                            "type": "workspaces"
+                                        }
+                                    ]
+                                },
+                                "projects": {
+                                    "data": []
+                                }
+                            }
                         }
-                    },
-                )[0]
-
-                # Push arbitrary data to the workspace
-                push = docker.run(
-                    detach=False,
-                    envs={
-                        "ORG": organization.get("attributes.name"),
-                    },
-                    image=self._config.get("push_image", "ghcr.io/spacelift-io/terraform-push:latest"),
-                    pull="always",
-                    remove=True,
-                    volumes={
-                        (f"{os.environ['HOME']}/.terraform.d/", "/root/.terraform.d/"),
                     }
                 )
-                logging.info(push)
 
-                #Update workspace to use the TFC agent
-                self._extract_data_from_api(
-                    method="PATCH",
-                    path=f"/workspaces/{new_workspace.get('id')}",
+                logging.info(f"Trigger a plan for the '{organization.get('id')}/{new_workspace.get('id')}' "
+                             f"workspace")
+                run_data = self._extract_data_from_api(
+                    method="POST",
+                    path="/runs",
+                    properties=["relationships.plan.data.id", "id"],
                     request_data={
                         "data": {
                             "attributes": {
-                                "agent-pool-id": agent_pool_id,
-                                "execution-mode": "agent",
-                                "setting-overwrites": {"execution-mode": True, "agent-pool": True},
+                                "allow-empty-apply": False,
+                                "plan-only": True,
+                                "refresh": False,  # No need to waste time refreshing the state
+                            },
+                            "relationships": {
+                                "workspace": {"data": {"id": new_workspace.get('id'), "type": "workspaces"}},
                             },
-                            "type": "workspaces",
+                            "type": "runs",
                         }
                     },
                 )
 
-                # Find variable sets in the current org
-                variable_sets_in_organization = []
-                for variable_set in data.get("variable_sets"):
-                    if variable_set.get("relationships.organization.data.id") == organization.get("id"):
-                        variable_sets_in_organization.append(variable_set)
-
-                for var_set in variable_sets_in_organization:
-                    var_set_id = var_set.get("id")
-
-                    # Backup variable attachment info
-                    variable_set_relationship_backup = self._extract_data_from_api(
-                        path=f"/varsets/{var_set_id}",
-                        properties=[
-                            "attributes.name",
-                            "attributes.global",
-                            "attributes.priority",
-                            "relationships.workspaces.data",
-                            "relationships.projects.data",
-                            "relationships.organizations.data"
-                        ],
-                    )[0]
-
-                    logging.info(f"Updating {var_set_id} to attach to the workspace {new_workspace.get('id')}")
-                    var_set_reset = False
-                    # Add Var Set to only the new workspace and set it as priority
-                    self._extract_data_from_api(
-                        method="PATCH",
-                        path=f"/varsets/{var_set_id}",
-                        request_data={
-                            "data": {
-                                "attributes": {
-                                    "global": False,
-                                    "priority": True,
-                                },
-                                "relationships": {
-                                    "workspaces": {
-                                        "data": [
-                                            {
-                                                "id": new_workspace.get("id"),
-                                                "type": "workspaces"
-                                            }
-                                        ]
-                                    },
-                                    "projects": {
-                                        "data": []
-                                    }
-                                }
-                            }
-                        }
-                    )
+                if len(run_data) == 0:
+                    raise TerraformExporterPlanError(organization.get('id'), new_workspace.get('id'))
 
-                    logging.info(f"Trigger a plan for the '{organization.get('id')}/{new_workspace.get('id')}' "
-                                 f"workspace")
-                    run_data = self._extract_data_from_api(
-                        method="POST",
-                        path="/runs",
-                        properties=["relationships.plan.data.id", "id"],
-                        request_data={
-                            "data": {
-                                "attributes": {
-                                    "allow-empty-apply": False,
-                                    "plan-only": True,
-                                    "refresh": False,  # No need to waste time refreshing the state
-                                },
-                                "relationships": {
-                                    "workspace": {"data": {"id": new_workspace.get('id'), "type": "workspaces"}},
-                                },
-                                "type": "runs",
-                            }
-                        },
-                    )
+                # KLUDGE: There should be a way to pull single item from the API instead of a list of items
+                run_data = run_data[0]
 
-                    if len(run_data) == 0:
-                        raise TerraformExporterPlanError(organization.get('id'), new_workspace.get('id'))
-
-                    # KLUDGE: There should be a way to pull single item from the API instead of a list of items
-                    run_data = run_data[0]
-
-                    logging.info("Waiting for plan to finish")
-                    plan_id = run_data.get("relationships.plan.data.id")
-                    plan_data = self._get_plan(id_=plan_id)
-                    run_id = run_data.get("id")
-
-                    if plan_data.get("attributes.log-read-url"):
-                        logs_data = self._get_log_data_from_disk(run_id)
+                logging.info("Waiting for plan to finish")
+                plan_id = run_data.get("relationships.plan.data.id")
+                plan_data = self._get_plan(id_=plan_id)
+                run_id = run_data.get("id")
 
+                if plan_data.get("attributes.log-read-url"):
+                    # Only read the whole log when it is going to be logged
+                    if logging.getLogger().isEnabledFor(logging.DEBUG):
                         logging.debug("Plan output:")
-                        logging.debug(logs_data)
-
-                        logging.info("Extract the env var values from the plan output")
-                        for line in logs_data.split("\n"):
-                            for var in data.get("variable_set_variables"):
-                                if var.get("relationships.varset.data.id") == var_set_id:
-                                    key = var.get("attributes.key")
-                                    if line.startswith(f"{key}="):
-                                        value = line.removeprefix(f"{key}=")
-                                        masked_value = "*" * len(value)
+                        logging.debug(self._get_log_data_from_disk(run_id))
+
+                    logging.info("Extract the env var values from the plan output")
+                    # A Terraform variable and an env var can share the same key, but only env vars are
+                    # dumped to the plan output
+                    wanted_vars = {
+                        (var.get("attributes.category"), var.get("attributes.key")): var
+                        for var in vars_by_varset[var_set_id]
+                    }
+                    for line in self._iter_log_lines_from_disk(run_id):
+                        key, separator, value = line.partition("=")
+                        if separator and ("env", key) in wanted_vars:
+                            masked_value = "*" * len(value)
 
-                                        logging.debug(f"Found sensitive env var: '{key}={masked_value}'")
+                            logging.debug(f"Found sensitive env var: '{key}={masked_value}'")
 
-                                        var["attributes.value"] = value
+                            wanted_vars[("env", key)]["attributes.value"] = value
 
-                    reset_variable_set_relationships(var_set_id, variable_set_relationship_backup)
-                    var_set_reset = True
+                self._reset_variable_set_relationships(var_set_id, variable_set_relationship_backup)
+                var_set_reset = True
 
-                if agent_container.exists() and agent_container.state.running:
-                    logging.debug(f"Local TFC/TFE agent Docker container '{agent_container_id}' logs:")
-                    logging.debug(agent_container.logs())
-                else:
-                    logging.warning(
-                        f"Local TFC/TFE agent Docker container '{agent_container_id}' "
-                        "was already stopped when we tried to pull the logs. Skipping."
-                    )
+            if agent_container.exists() and agent_container.state.running:
+                logging.debug(f"Local TFC/TFE agent Docker container '{agent_container_id}' logs:")
+                logging.debug(agent_container.logs())
+            else:
+                logging.warning(
+                    f"Local TFC/TFE agent Docker container '{agent_container_id}' "
+                    "was already stopped when we tried to pull the logs. Skipping."
+                )
 
         finally:
-            logging.info("Stop enriching variable_set data")
+            logging.info(f"Stop local TFC/TFE agent for organization '{organization.get('id')}'")
 
             if new_workspace is not None:
                 logging.info(f"Deleting workspace {new_workspace.get('id')}")
@@ -570,7 +807,7 @@ class TerraformExporter(BaseExporter):
                 )
 
             if not var_set_reset:
-                reset_variable_set_relationships(var_set_id, variable_set_relationship_backup)
+                self._reset_variable_set_relationships(var_set_id, variable_set_relationship_backup)
 
             if agent_container:
                 self._stop_agent_container(agent_container)
@@ -578,31 +815,46 @@ class TerraformExporter(BaseExporter):
             if agent_pool_id:
                 self._delete_agent_pool(id_=agent_pool_id)
 
+    def _reset_variable_set_relationships(self, var_set_id: str, variable_set_relationship_backup: dict) -> None:
+        request = {}
+        if variable_set_relationship_backup.get("relationships.workspaces.data") is not None:
+            request["workspaces"] = {"data": variable_set_relationship_backup.get("relationships.workspaces.data")}
+        if variable_set_relationship_backup.get("relationships.projects.data") is not None:
+            request["projects"] = {"data": variable_set_relationship_backup.get("relationships.projects.data")}
 
-        return data
+        self._extract_data_from_api(
+            method="PATCH",
+            path=f"/varsets/{var_set_id}",
+            request_data={
+                "data": {
+                    "attributes": {
+                        "priority": variable_set_relationship_backup.get("attributes.priority"),
+                        "global": variable_set_relationship_backup.get("attributes.global"),
+                    },
+                    "relationships": request
+                }
+            }
+        )
 
 
     # KLUDGE: We should break this function down in smaller functions
     def _enrich_workspace_variable_data(self, data: dict) -> dict:  # noqa: PLR0912, PLR0915
-        def find_workspace(data: dict, workspace_id: str) -> dict:
-            for workspace in data.get("workspaces"):
-                if workspace.get("id") == workspace_id:
-                    return workspace
+        def find_workspace(workspaces_by_id: dict, workspace_id: str) -> dict:
+            workspace = workspaces_by_id.get(workspace_id)
+            if workspace is None:
+                logging.warning(f"Could not find workspace '{workspace_id}'")
 
-            logging.warning(f"Could not find workspace '{workspace_id}'")
+            return workspace
 
-            return None
-
-        def find_variable(data: dict, variable_id: str) -> dict:
-            for variable in data.get("workspace_variables"):
-                if variable.get("id") == variable_id:
-                    return variable
-
-            logging.warning(f"Could not find variable '{variable_id}'")
+        def find_variable(variables_by_id: dict, variable_id: str) -> dict:
+            variable = variables_by_id.get(variable_id)
+            if variable is None:
+                logging.warning(f"Could not find variable '{variable_id}'")
 
-            return None
+            return variable
 
-        if not is_command_available(["docker", "ps"], execute=True) and not is_command_available(["podman", "ps"], execute=True):
+        docker_ok, podman_ok = _has_container_runtime()
+        if not (docker_ok or podman_ok):
             logging.warning("Both Docker and Podman are not available. Skipping enriching workspace variables data.")
             return data
 
@@ -614,24 +866,26 @@ class TerraformExporter(BaseExporter):
 
         logging.info("Start enriching workspace variables data")
 
-        # List organizations, workspaces and associated variables
-        organizations = benedict()
+        # Index workspaces and variables by ID, as they are looked up for every sensitive variable
+        workspaces_by_id = {workspace.get("id"): workspace for workspace in data.get("workspaces")}
+        variables_by_id = {variable.get("id"): variable for variable in data.get("workspace_variables")}
+
+        # List organizations, workspaces and associated variables.
+        # IDs never contain dots, so plain dicts are enough.
+        organizations: dict[str, dict[str, dict[str, tuple[str, str]]]] = {}
         for variable in data.get("workspace_variables"):
             if variable.get("attributes.sensitive") is False:
                 continue
 
             workspace_id = variable.get("relationships.workspace.data.id")
-            organization_id = find_workspace(data, workspace_id).get("relationships.organization.data.id")
-
-            if organization_id not in organizations:
-                organizations[organization_id] = benedict()
+            organization_id = find_workspace(workspaces_by_id, workspace_id).get("relationships.organization.data.id")
 
-            if workspace_id not in organizations[organization_id]:
-                organizations[organization_id][workspace_id] = benedict()
-
-            organizations[organization_id][workspace_id][variable.get("id")] = variable.get("attributes.key")
+            organizations.setdefault(organization_id, {}).setdefault(workspace_id, {})[variable.get("id")] = (
+                variable.get("attributes.category"),
+                variable.get("attributes.key"),
+            )
 
-        if len(organizations) == 0 or len(organizations.keys()) == 0:
+        if len(organizations) == 0:
             return data
 
         for organization_id, workspaces in organizations.items():
@@ -657,7 +911,7 @@ class TerraformExporter(BaseExporter):
 
                 for workspace_id, workspace_variables in workspaces.items():
                     current_workspace_id = workspace_id
-                    current_configuration_version_id = find_workspace(data, workspace_id).get(
+                    current_configuration_version_id = find_workspace(workspaces_by_id, workspace_id).get(
                         "relationships.current-configuration-version.data.id"
                     )
                     if current_configuration_version_id is None:
@@ -727,33 +981,35 @@ class TerraformExporter(BaseExporter):
                     run_id = run_data.get("id")
 
                     if plan_data.get("attributes.log-read-url"):
-                        logs_data = self._get_log_data_from_disk(run_id)
-
-                        logging.debug("Plan output:")
-                        logging.debug(logs_data)
+                        # Only read the whole log when it is going to be logged
+                        if logging.getLogger().isEnabledFor(logging.DEBUG):
+                            logging.debug("Plan output:")
+                            logging.debug(self._get_log_data_from_disk(run_id))
 
                         logging.info("Extract the env var values from the plan output")
-                        for line in logs_data.split("\n"):
-                            for workspace_variable_id, workspace_variable_name in workspace_variables.items():
-                                prefix = f"{workspace_variable_name}="
-                                if line.startswith(prefix):
-                                    value = line.removeprefix(prefix)
-                                    masked_value = "*" * len(value)
-
-                                    logging.debug(
-                                        f"Found sensitive env var: '{workspace_variable_name}={masked_value}'"
-                                    )
-
-                                    variable = find_variable(data, workspace_variable_id)
-                                    variable["attributes.value"] = value
-
-                                # KLUDGE: Ideally this should be retrieved independently for more clarity,
-                                # and only if needed.
-                                if line.startswith("ATLAS_CONFIGURATION_VERSION_GITHUB_BRANCH="):
-                                    branch_name = line.removeprefix("ATLAS_CONFIGURATION_VERSION_GITHUB_BRANCH=")
-                                    workspace = find_workspace(data, workspace_id)
-                                    if workspace and not workspace.get("attributes.vcs-repo.branch"):
-                                        workspace["attributes.vcs-repo.branch"] = branch_name
+                        # A Terraform variable and an env var can share the same key, but only env vars are
+                        # dumped to the plan output
+                        variable_ids_by_key = {category_key: id_ for id_, category_key in workspace_variables.items()}
+                        for line in self._iter_log_lines_from_disk(run_id):
+                            key, separator, value = line.partition("=")
+                            if not separator:
+                                continue
+
+                            workspace_variable_id = variable_ids_by_key.get(("env", key))
+                            if workspace_variable_id is not None:
+                                masked_value = "*" * len(value)
+
+                                logging.debug(f"Found sensitive env var: '{key}={masked_value}'")
+
+                                variable = find_variable(variables_by_id, workspace_variable_id)
+                                variable["attributes.value"] = value
+
+                            # KLUDGE: Ideally this should be retrieved independently for more clarity,
+                            # and only if needed.
+                            if key == "ATLAS_CONFIGURATION_VERSION_GITHUB_BRANCH":
+                                workspace = find_workspace(workspaces_by_id, workspace_id)
+                                if workspace and not workspace.get("attributes.vcs-repo.branch"):
+                                    workspace["attributes.vcs-repo.branch"] = value
 
                     self._restore_workspace_exec_mode(organization_id, workspace_id, workspace_data_backup)
                     restored_agent = True
@@ -795,24 +1051,27 @@ class TerraformExporter(BaseExporter):
         return data
 
     def _expand_relationships(self, data: dict) -> dict:
+        # Entities indexed by source ID, built for each type on first lookup
+        entities_by_source_id = {}
+
         def find_entity(data: dict, type_: str, id_: str) -> dict:
             # KLUDGE: Pluralize the type if not already pluralized
             # This should be made more robust
             if not type_.endswith("s"):
                 type_ = f"{type_}s"
 
-            for src_datum in data.get(type_):
-                if src_datum.get("_source_id") == id_:
-                    # Clone to avoid modifying the original dict when removing the relationships
-                    # on the expanded relationship
-                    datum = src_datum.clone()
-
-                    if "_relationships" in datum:
-                        del datum["_relationships"]
+            if type_ not in entities_by_source_id:
+                entities_by_source_id[type_] = {}
+                for src_datum in data.get(type_):
+                    entities_by_source_id[type_].setdefault(src_datum.get("_source_id"), src_datum)
 
-                    return datum
+            src_datum = entities_by_source_id[type_].get(id_)
+            if src_datum is None:
+                return None
 
-            return None
+            # Shallow copy without the relationships, so the original dict is left untouched.
+            # The copy is made on each lookup as the entity may have been expanded since the previous one.
+            return {key: value for key, value in src_datum.items() if key != "_relationships"}
 
         def expand_relationship(entity_data) -> None:
             for datum in entity_data:
@@ -866,26 +1125,54 @@ class TerraformExporter(BaseExporter):
             }
         )
 
-        for organization in data.organizations:
-            data["agent_pools"].extend(self._extract_agent_pools_data(organization))
-            data["modules"].extend(self._extract_modules_data(organization))
-            data["policies"].extend(self._extract_policies_data(organization))
-            data["policy_sets"].extend(self._extract_policy_sets_data(organization))
-            data["projects"].extend(self._extract_projects_data(organization))
-            data["providers"].extend(self._extract_providers_data(organization))
-            data["tasks"].extend(self._extract_tasks_data(organization))
-            data["teams"].extend(self._extract_teams_data(organization))
-            data["workspaces"].extend(self._extract_workspaces_data(organization))
+        extractors = {
+            "agent_pools": self._extract_agent_pools_data,
+            "modules": self._extract_modules_data,
+            "policies": self._extract_policies_data,
+            "policy_sets": self._extract_policy_sets_data,
+            "projects": self._extract_projects_data,
+            "providers": self._extract_providers_data,
+            "tasks": self._extract_tasks_data,
+            "teams": self._extract_teams_data,
+            "workspaces": self._extract_workspaces_data,
+        }
+        if self.experimental_support_variable_sets:
+            extractors["variable_sets"] = self._extract_variable_sets_data
+
+        # API calls are bound by network latency, so they are run concurrently.
+        # Results are collected in submission order to keep the output stable.
+        with ThreadPoolExecutor(max_workers=self._config.get("concurrency", 16)) as executor:
+            futures = [
+                (entity_type, executor.submit(extractor, organization))
+                for organization in data.organizations
+                for entity_type, extractor in extractors.items()
+            ]
+            for entity_type, future in futures:
+                data[entity_type].extend(future.result())
 
+            # Variables can only be extracted once their variable sets and workspaces are known
+            futures = []
             if self.experimental_support_variable_sets:
-                data["variable_sets"].extend(self._extract_variable_sets_data(organization))
+                futures.extend(
+                    ("variable_set_variables", executor.submit(self._extract_variable_set_variables_data, variable_set))
+                    for variable_set in data.variable_sets
+                )
 
-        if self.experimental_support_variable_sets:
-            for variable_set in data.variable_sets:
-                data["variable_set_variables"].extend(self._extract_variable_set_variables_data(variable_set))
+            # Fetch the variables of each workspace only once, even if it was listed more than once
+            seen_workspace_ids = set()
+            for workspace in data.workspaces:
+                workspace_id = workspace.get("id")
+                if workspace_id in seen_workspace_ids:
+                    logging.debug(f"Skipping already extracted variables for workspace '{workspace_id}'")
+                    continue
+
+                seen_workspace_ids.add(workspace_id)
+                futures.append(
+                    ("workspace_variables", executor.submit(self._extract_workspace_variables_data, workspace))
+                )
 
-        for workspace in data.workspaces:
-            data["workspace_variables"].extend(self._extract_workspace_variables_data(workspace))
+            for entity_type, future in futures:
+                data[entity_type].extend(future.result())
 
         logging.info("Stop extracting data")
 
@@ -896,6 +1183,7 @@ class TerraformExporter(BaseExporter):
         path: str,
         drop_response_properties: list | None = None,
         include_pattern: str | None = None,
+        included: dict | None = None,
         method: str = "GET",
         properties: list | None = None,
         request_data: dict | None = None,
@@ -908,42 +1196,83 @@ class TerraformExporter(BaseExporter):
         endpoint = self._config.get("api_endpoint", "https://app.terraform.io")
         url = f"{endpoint}/api/v2{path}"
 
-        raw_data = []
-        while True:
-            response_payload = self._call_api(
-                url, drop_response_properties=drop_response_properties, method=method, request_data=request_data
-            )
+        # Split the keypaths once instead of once per property per resource
+        property_keys = tuple(tuple(property_.split(".")) for property_ in properties or ())
+        extract_page = functools.partial(
+            self._extract_page_from_api,
+            drop_response_properties=drop_response_properties,
+            include_regex=_compile_include_pattern(include_pattern),
+            included=included,
+            method=method,
+            property_keys=property_keys,
+            request_data=request_data,
+        )
 
-            if response_payload.get("data"):
-                if isinstance(response_payload["data"], dict):  # Individual resource
-                    raw_data.append(response_payload["data"])
-                else:  # Collection of resources
-                    raw_data.extend(response_payload["data"])
+        response_payload = extract_page(url)
+        pages = [response_payload]
 
-            if response_payload.get("links.next"):
+        pagination = (response_payload.get("meta") or {}).get("pagination") or {}
+        if method == "GET" and (pagination.get("total-pages") or 1) > 1:
+            # The page count is known, so fetch the remaining pages concurrently
+            page_urls = [
+                _build_page_url(url, page_number, pagination.get("page-size"))
+                for page_number in range(2, pagination.get("total-pages") + 1)
+            ]
+            with ThreadPoolExecutor(max_workers=min(len(page_urls), 4)) as executor:
+                pages.extend(executor.map(extract_page, page_urls))
+        else:
+            # Otherwise follow the links from page to page
+            url = (response_payload.get("links") or {}).get("next")
+            while url:
                 logging.debug("Pulling the next page from the API")
-                url = response_payload.get("links.next")
-            else:
-                break
+                response_payload = extract_page(url)
+                pages.append(response_payload)
+                url = (response_payload.get("links") or {}).get("next")
 
-        include_regex = re.compile(include_pattern)
-
-        data = []
-        for raw_datum in raw_data:
-            if raw_datum.get("attributes.name") and include_regex.match(raw_datum.get("attributes.name")) is None:
-                continue
-
-            if properties:
-                # KLUDGE: There must be a cleaner way to handle this
-                datum = benedict()
-                for property_ in properties:
-                    datum[property_] = raw_datum.get(property_)
-                data.append(datum)
+        # Callers update the data using keypaths
+        data = [benedict(datum) for response_payload in pages for datum in response_payload.get("data") or []]
 
         logging.debug("Stop extracting data from API")
 
         return data
 
+    def _extract_page_from_api(
+        self,
+        url: str,
+        drop_response_properties: list | None,
+        include_regex: re.Pattern,
+        included: dict | None,
+        method: str,
+        property_keys: tuple[tuple[str, ...], ...],
+        request_data: dict | None,
+    ) -> dict:
+        response_payload = self._call_api(
+            url,
+            drop_response_properties=drop_response_properties,
+            method=method,
+            request_data=request_data,
+            return_benedict=False,
+        )
+
+        # Responses without content have neither data nor a next page
+        if response_payload is _EMPTY_RESPONSE:
+            return response_payload
+
+        # Collect the related resources included in the response, keyed by ID
+        included_resources = response_payload.pop("included", None) or []
+        if included is not None:
+            included.update({resource.get("id"): resource for resource in included_resources})
+
+        raw_data = response_payload.get("data") or []
+        if isinstance(raw_data, dict):  # Individual resource
+            raw_data = [raw_data]
+
+        # Only keep the requested properties of each resource as soon as the page is received,
+        # so the rest of the payload does not stay in memory until all pages are fetched.
+        response_payload["data"] = _project_resources(raw_data, include_regex, property_keys)
+
+        return response_payload
+
     def _extract_agent_pools_data(self, organization: dict) -> list[dict]:
         agent_pools_filter = self._config.get("include.agent_pools")
         if agent_pools_filter == "none":
@@ -986,9 +1315,14 @@ class TerraformExporter(BaseExporter):
         )
 
         data = []
+        organization_id = organization.get("id")
         for list_datum in list_data:
+            registry = list_datum.get("attributes.registry-name")
+            namespace = list_datum.get("attributes.namespace")
+            name = list_datum.get("attributes.name")
+            provider = list_datum.get("attributes.provider")
             module_data = self._extract_data_from_api(
-                path=f"/organizations/{organization.get('id')}/registry-modules/{list_datum.get('attributes.registry-name')}/{list_datum.get('attributes.namespace')}/{list_datum.get('attributes.name')}/{list_datum.get('attributes.provider')}",
+                path=f"/organizations/{organization_id}/registry-modules/{registry}/{namespace}/{name}/{provider}",
                 properties=[
                     "attributes.name",
                     "attributes.provider",
@@ -1228,11 +1562,25 @@ class TerraformExporter(BaseExporter):
             "id",
             "relationships.workspace.data.id",
         ]
-        data = self._extract_data_from_api(
-            include_pattern=self._config.get("include.workspace_variables"),
-            path=f"/workspaces/{workspace.get('id')}/vars",
-            properties=properties,
-        )
+
+        # Reuse the variables included when listing workspaces, if the API supported it
+        included_variables = self._included_workspace_variables.get(workspace.get("id"))
+        if included_variables is not None:
+            logging.debug(f"Using the variables included with workspace {workspace.get('attributes.name')}")
+            data = [
+                benedict(datum)
+                for datum in _project_resources(
+                    included_variables,
+                    _compile_include_pattern(self._config.get("include.workspace_variables") or ".*"),
+                    tuple(tuple(property_.split(".")) for property_ in properties),
+                )
+            ]
+        else:
+            data = self._extract_data_from_api(
+                include_pattern=self._config.get("include.workspace_variables"),
+                path=f"/workspaces/{workspace.get('id')}/vars",
+                properties=properties,
+            )
 
         logging.info("Stop extracting workspace variables data")
 
@@ -1246,6 +1594,7 @@ class TerraformExporter(BaseExporter):
             "attributes.description",
             "attributes.name",
             "attributes.resource-count",
+            "attributes.tag-names",
             "attributes.terraform-version",
             "attributes.vcs-repo.branch",
             "attributes.vcs-repo.identifier",
@@ -1266,7 +1615,7 @@ class TerraformExporter(BaseExporter):
             try:
                 with open(workspace_list, 'r') as file:
                     lines = file.read().splitlines()
-                    workspace_filter = [line.strip() for line in lines if line.strip()]
+                    workspace_filter = frozenset(line.strip() for line in lines if line.strip())
                 logging.info(f"Loaded {len(workspace_filter)} workspaces from {workspace_list}")
                 include_pattern = ".*"
             except Exception as e:
@@ -1278,41 +1627,66 @@ class TerraformExporter(BaseExporter):
                 include_pattern = workspace_filter
             elif isinstance(workspace_filter, list):
                 filter_list = True
+                workspace_filter = frozenset(workspace_filter)
                 include_pattern = ".*"
             else:
                 include_pattern = ".*"
             
-        data = self._extract_data_from_api(
-            include_pattern=include_pattern,
-            path=f"/organizations/{organization.get('id')}/workspaces",
-            properties=properties,
-        )
-        
-        if filter_list:
-            data = [workspace for workspace in data if workspace.get("attributes.name") in workspace_filter]
-
-        # Get tag names for every stack and update the benedict with those tag names.
-        for i in data:
-            if filter_list:
-                if i.get("attributes.name") not in workspace_filter:
-                    continue
-
-            additional_properties = [
-                "attributes.tag-names"
-            ]
-
-            additional_data = self._extract_data_from_api(
+        # Include the current state versions, so that state files can be downloaded without looking them up,
+        # and the variables, so that they do not need to be listed for each workspace.
+        # Not all TFE versions support including variables, so fall back to only including the state versions.
+        included = {}
+        path = f"/organizations/{organization.get('id')}/workspaces"
+        try:
+            data = self._extract_data_from_api(
+                include_pattern=include_pattern,
+                included=included,
+                path=f"{path}?include=current-state-version,vars",
+                properties=properties,
+            )
+        except RuntimeError as e:
+            logging.debug(f"Could not include variables when listing workspaces ({e}). Listing them per workspace.")
+            included = {}
+            data = self._extract_data_from_api(
                 include_pattern=include_pattern,
-                path=f"/workspaces/{i.get('id')}",
-                properties=additional_properties,
+                included=included,
+                path=f"{path}?include=current-state-version",
+                properties=properties,
             )
 
-            i["attributes.tag-names"] = additional_data[0].get("attributes.tag-names")
+        self._store_workspaces_included_resources(workspaces=data, included=included)
+        
+        # Names are looked up in a set, which unlike a regex alternation does not slow down as the list grows
+        if filter_list:
+            data = [workspace for workspace in data if workspace.get("attributes.name") in workspace_filter]
 
         logging.info("Stop extracting workspaces data")
 
         return data
 
+    def _store_workspaces_included_resources(self, workspaces: list[dict], included: dict) -> None:
+        variables_by_workspace_id = {}
+        for resource in included.values():
+            if resource.get("type") == "state-versions":
+                self._state_download_urls[resource.get("id")] = (resource.get("attributes") or {}).get(
+                    "hosted-state-download-url"
+                )
+            elif resource.get("type") == "vars":
+                # Depending on the TFE version, variables relate to their workspace through either relationship
+                relationships = resource.setdefault("relationships", {})
+                workspace_relationship = relationships.get("workspace") or relationships.get("configurable") or {}
+                workspace_id = (workspace_relationship.get("data") or {}).get("id")
+                relationships.setdefault("workspace", {"data": {"id": workspace_id, "type": "workspaces"}})
+                variables_by_workspace_id.setdefault(workspace_id, []).append(resource)
+
+        # Workspaces without variables have none included, which cannot be told apart from an API ignoring
+        # the include parameter. Only rely on the included variables if there are some.
+        if variables_by_workspace_id:
+            for workspace in workspaces:
+                self._included_workspace_variables[workspace.get("id")] = variables_by_workspace_id.get(
+                    workspace.get("id"), []
+                )
+
     def _find_entity(self, data: list[dict], id_: str) -> dict | None:
         logging.debug(f"Start searching for entity ({id_})")
 
@@ -1327,9 +1701,16 @@ class TerraformExporter(BaseExporter):
         return entity
 
     def _generate_migration_id(self, *args: str) -> str:
-        return slugify("_".join(args)).replace("-", "_")
+        return _generate_migration_id_cached(args)
 
     def _get_plan(self, id_: str) -> dict:
+        # Plans in a terminal state never change, so they are only fetched once
+        if id_ in self._terminal_plans:
+            return self._terminal_plans[id_]
+
+        # Poll quickly at first, as plans may finish fast, then back off up to 15 seconds between polls.
+        # Jitter keeps concurrent pollers from hitting the API in lockstep.
+        delay = 1.0
         while True:
             data = self._extract_data_from_api(
                 path=f"/plans/{id_}", properties=["attributes.log-read-url", "attributes.status"]
@@ -1344,100 +1725,90 @@ class TerraformExporter(BaseExporter):
                 data = {}
                 break
             else:
-                logging.debug(f"Plan '{id_}' is not finished yet. Waiting 3 seconds before retrying.")
-                time.sleep(3)
+                wait = delay + random.uniform(0, delay * 0.1)
+                logging.debug(f"Plan '{id_}' is not finished yet. Waiting {wait:.1f} seconds before retrying.")
+                time.sleep(wait)
+                delay = min(delay * 2, 15.0)
+
+        self._terminal_plans[id_] = data
 
         return data
 
     def _map_context_variables_data(self, src_data: dict) -> dict:
-        def find_variable_set(data: dict, variable_set_id: str) -> dict:
-            for variable_set in data.get("variable_sets"):
-                if variable_set.get("id") == variable_set_id:
-                    return variable_set
-
-            logging.warning(f"Could not find variable set '{variable_set_id}'")
-
-            return None
+        def find_variable_set(variable_sets_by_id: dict, variable_set_id: str) -> dict:
+            variable_set = variable_sets_by_id.get(variable_set_id)
+            if variable_set is None:
+                logging.warning(f"Could not find variable set '{variable_set_id}'")
+
+            return variable_set
+
+        def make_row(migration_id: str, fields: dict, space_id: str, context_id: str, source_id: str) -> dict:
+            return {
+                "_migration_id": migration_id,
+                "_relationships": {
+                    "space": {"_migration_id": self._generate_migration_id(space_id)},
+                    "context": {"_migration_id": self._generate_migration_id(context_id)},
+                },
+                "_source_id": source_id,
+                **fields,
+            }
 
         logging.info("Start mapping context variables data")
 
+        variable_sets_by_id = {}
+        for variable_set in src_data.get("variable_sets"):
+            variable_sets_by_id.setdefault(variable_set.get("id"), variable_set)
+
         auto_fix_variable_names = self._config.get("auto_fix_variable_names", False)
 
-        prog = re.compile("^[a-zA-Z_]+[a-zA-Z0-9_]*$")
         data = []
         for variable in src_data.get("variable_set_variables"):
-            variable_set = find_variable_set(
-                data=src_data, variable_set_id=variable.get("relationships.varset.data.id")
-            )
-
-            is_name_valid = True
-
-            if re.search(prog, variable.get("attributes.key")) is None:
-                is_name_valid = False
+            variable_id = variable.get("id")
+            variable_set_id = variable.get("relationships.varset.data.id")
+            variable_set = find_variable_set(variable_sets_by_id=variable_sets_by_id, variable_set_id=variable_set_id)
+
+            key = variable.get("attributes.key")
+            is_name_valid = _is_valid_variable_name(key)
+            migration_id = self._generate_migration_id(variable_id)
+            fields = {
+                "description": variable.get("attributes.description"),
+                "hcl": variable.get("attributes.hcl"),
+                "name": key,
+                "replacement_name": key.replace("-", "_") if auto_fix_variable_names and not is_name_valid else key,
+                "type": "terraform" if variable.get("attributes.category") == "terraform" else "env_var",
+                "valid_name": is_name_valid,
+                "value": variable.get("attributes.value"),
+                "write_only": variable.get("attributes.sensitive"),
+            }
+            projects = variable_set.get("relationships.projects.data") or []
 
             # Terraform variable sets can be attached to multiple projects
             # while Spacelift contexts are attached to a single space.
             # To work around this quirk, we duplicate the context for each space.
-            if (
-                "relationships.projects.data" in variable_set
-                and variable_set.get("relationships.projects.data") is not None
-                and len(variable_set.get("relationships.projects.data")) > 0
-            ):
-                for project in variable_set.get("relationships.projects.data"):
+            if projects:
+                for project in projects:
+                    project_id = project.get("id")
                     logging.info(
-                        "Append context variable copy "
-                        f"'{project.get('id')}' / '{variable_set.get('id')}' / '{variable.get('id')}'"
+                        f"Append context variable copy '{project_id}' / '{variable_set.get('id')}' / '{variable_id}'"
                     )
                     data.append(
-                        {
-                            "_migration_id": self._generate_migration_id(variable.get("id")),
-                            "_relationships": {
-                                "space": {
-                                    "_migration_id": self._generate_migration_id(project.get("id"))
-                                },
-                                "context": {
-                                    "_migration_id": self._generate_migration_id(
-                                        f"{project.get('id')}_{variable_set.get('id')}"
-                                    ),
-                                },
-                            },
-                            "_source_id": f"{project.get('id')}_{variable.get('id')}",
-                            "description": variable.get("attributes.description"),
-                            "hcl": variable.get("attributes.hcl"),
-                            "name": variable.get("attributes.key"),
-                            "replacement_name" : variable.get("attributes.key").replace("-", "_") if auto_fix_variable_names and not is_name_valid  else variable.get("attributes.key"),
-                            "type": "terraform" if variable.get("attributes.category") == "terraform" else "env_var",
-                            "valid_name": is_name_valid,
-                            "value": variable.get("attributes.value"),
-                            "write_only": variable.get("attributes.sensitive"),
-                        }
+                        make_row(
+                            migration_id=migration_id,
+                            fields=fields,
+                            space_id=project_id,
+                            context_id=f"{project_id}_{variable_set.get('id')}",
+                            source_id=f"{project_id}_{variable_id}",
+                        )
                     )
             else:
                 data.append(
-                    {
-                        "_migration_id": self._generate_migration_id(variable.get("id")),
-                        "_relationships": {
-                            "space": {
-                                "_migration_id": self._generate_migration_id(
-                                    variable_set.get("relationships.organization.data.id")
-                                )
-                            },
-                            "context": {
-                                "_migration_id": self._generate_migration_id(
-                                    variable.get("relationships.varset.data.id")
-                                )
-                            },
-                        },
-                        "_source_id": variable.get("id"),
-                        "description": variable.get("attributes.description"),
-                        "hcl": variable.get("attributes.hcl"),
-                        "name": variable.get("attributes.key"),
-                        "replacement_name" : variable.get("attributes.key").replace("-", "_") if auto_fix_variable_names and not is_name_valid  else variable.get("attributes.key"),
-                        "type": "terraform" if variable.get("attributes.category") == "terraform" else "env_var",
-                        "valid_name": is_name_valid,
-                        "value": variable.get("attributes.value"),
-                        "write_only": variable.get("attributes.sensitive"),
-                    }
+                    make_row(
+                        migration_id=migration_id,
+                        fields=fields,
+                        space_id=variable_set.get("relationships.organization.data.id"),
+                        context_id=variable_set_id,
+                        source_id=variable_id,
+                    )
                 )
 
         logging.info("Stop mapping context variables data")
@@ -1449,73 +1820,70 @@ class TerraformExporter(BaseExporter):
 
         data = []
         for variable_set in src_data.get("variable_sets"):
+            variable_set_id = variable_set.get("id")
+            variable_set_description = variable_set.get("attributes.description")
+            variable_set_name = variable_set.get("attributes.name")
+            variable_set_migration_id = self._generate_migration_id(variable_set_id)
+            organization_migration_id = self._generate_migration_id(
+                variable_set.get("relationships.organization.data.id")
+            )
+            projects = variable_set.get("relationships.projects.data") or []
+            workspaces = variable_set.get("relationships.workspaces.data") or []
+
             if variable_set.get("attributes.global"):
                 data.append(
                     {
-                        "_migration_id": self._generate_migration_id(variable_set.get("id")),
+                        "_migration_id": variable_set_migration_id,
                         "_relationships": {
-                            "space": {
-                                "_migration_id": self._generate_migration_id(
-                                    variable_set.get("relationships.organization.data.id")
-                                )
-                            },
+                            "space": {"_migration_id": organization_migration_id},
                             "stacks": [],  # The list is empty because it will be auto-attached to all stacks
                         },
-                        "_source_id": variable_set.get("id"),
-                        "description": variable_set.get("attributes.description"),
+                        "_source_id": variable_set_id,
+                        "description": variable_set_description,
                         "labels": ["autoattach:*"],
-                        "name": variable_set.get("attributes.name")
+                        "name": variable_set_name,
                     }
                 )
-            elif (
-                "relationships.projects.data" in variable_set
-                and variable_set.get("relationships.projects.data") is not None
-                and len(variable_set.get("relationships.projects.data")) > 0
-            ):
-                for project in variable_set.get("relationships.projects.data"):
-                    logging.info(f"Append context copy '{project.get('id')}' / '{variable_set.get('id')}'")
+            elif projects:
+                # Only the relationships and source ID differ between the copies
+                base = {
+                    "_migration_id": variable_set_migration_id,
+                    "description": variable_set_description,
+                    "name": variable_set_name,
+                }
+                for project in projects:
+                    project_id = project.get("id")
+                    logging.info(f"Append context copy '{project_id}' / '{variable_set_id}'")
                     data.append(
                         {
-                            "_migration_id": self._generate_migration_id(variable_set.get("id")),
+                            **base,
                             "_relationships": {
-                                "space": {
-                                    "_migration_id": self._generate_migration_id(project.get("id"))
-                                },
+                                "space": {"_migration_id": self._generate_migration_id(project_id)},
                                 "stacks": [],  # The list is empty because it will be auto-attached to all stacks
                             },
-                            "_source_id": f"{project.get('id')}_{variable_set.get('id')}",
-                            "description": variable_set.get("attributes.description"),
+                            "_source_id": f"{project_id}_{variable_set_id}",
                             "labels": ["autoattach:*"],
-                            "name": variable_set.get("attributes.name"),
                         }
                     )
 
             # If the variable set is attached to the project, we dont need to also attach it to the workspace
             # as it will already be attached to the workspace via the project relationship.
-            elif (
-                "relationships.workspaces.data" in variable_set
-                and variable_set.get("relationships.workspaces.data") is not None
-                and len(variable_set.get("relationships.workspaces.data")) > 0
-            ):
-                stacks = []
-                for workspace in variable_set.get("relationships.workspaces.data"):
-                    stacks.append({"_migration_id": self._generate_migration_id(workspace.get("id"))})
+            elif workspaces:
+                stacks = [
+                    {"_migration_id": self._generate_migration_id(workspace.get("id"))} for workspace in workspaces
+                ]
 
                 data.append(
                     {
-                        "_migration_id": self._generate_migration_id(variable_set.get("id")),
+                        "_migration_id": variable_set_migration_id,
                         "_relationships": {
-                            "space": {
-                                "_migration_id": self._generate_migration_id(
-                                        variable_set.get("relationships.organization.data.id")
-                                    )
-                            },
+                            "space": {"_migration_id": organization_migration_id},
                             "stacks": stacks,
                         },
-                        "_source_id": variable_set.get("id"),
-                        "description": variable_set.get("attributes.description"),
+                        "_source_id": variable_set_id,
+                        "description": variable_set_description,
                         "labels": [],
-                        "name": variable_set.get("attributes.name"),
+                        "name": variable_set_name,
                     }
                 )
 
@@ -1536,23 +1904,16 @@ class TerraformExporter(BaseExporter):
                             " Modules will be mapped as Azure DevOps.")
             vcs_provider = "azure_devops"
 
+        # GitLab identifiers take precedence, as they were detected first
+        identifier_provider = "gitlab" if self.is_gitlab else vcs_provider
+
         data = []
         for module in src_data.get("modules"):
-            if self.is_gitlab and module.get("attributes.vcs-repo.identifier"):
-                segments = module.get("attributes.vcs-repo.identifier").split("/")
-                vcs_namespace = "/".join(segments[:-1])
-                vcs_repository = segments[-1]
-            elif self.is_ado and module.get("attributes.vcs-repo.identifier"):
-                segments = module.get("attributes.vcs-repo.identifier").split("/")
-                vcs_namespace = segments[1]
-                vcs_repository = segments[3]
-            elif not self.is_gitlab and not self.is_ado and module.get("attributes.vcs-repo.identifier"):
-                segments = module.get("attributes.vcs-repo.identifier").split("/")
-                vcs_namespace = segments[0]
-                vcs_repository = segments[1]
-            else:
-                vcs_namespace = None
-                vcs_repository = None
+            attributes = _as_dict(module).get("attributes") or {}
+            vcs_repo = attributes.get("vcs-repo") or {}
+            vcs_identifier = vcs_repo.get("identifier")
+
+            vcs_namespace, vcs_repository = _parse_vcs_identifier(vcs_identifier, identifier_provider)
 
             if "relationships.project.data.id" in module:
                 space_id = module.get("relationships.project.data.id")
@@ -1563,12 +1924,12 @@ class TerraformExporter(BaseExporter):
                 {
                     "_relationships": {"space": space_id},
                     "_source_id": module.get("id"),
-                    "name": module.get("attributes.name"),
-                    "status": module.get("attributes.status"),
-                    "terraform_provider": module.get("attributes.provider"),
-                    "visibility": module.get("attributes.registry-name"),
+                    "name": attributes.get("name"),
+                    "status": attributes.get("status"),
+                    "terraform_provider": attributes.get("provider"),
+                    "visibility": attributes.get("registry-name"),
                     "vcs": {
-                        "branch": module.get("attributes.vcs-repo.branch"),
+                        "branch": vcs_repo.get("branch"),
                         "namespace": vcs_namespace,
                         "provider": vcs_provider,
                         "repository": vcs_repository,
@@ -1583,74 +1944,71 @@ class TerraformExporter(BaseExporter):
     def _map_spaces_data(self, src_data: dict) -> dict:
         logging.info("Start mapping spaces data")
 
-        data = []
-        for organization in src_data.get("organizations"):
-            data.append(
-                {
-                    "_source_id": organization.get("id"),
-                    "name": organization.get("attributes.name"),
-                    # Will be set to True in _mark_spaces_for_terraform_custom_workflow(), if needed
-                    "requires_terraform_workflow_tool": False,
-                }
-            )
-
-        for project in src_data.get("projects"):
-            data.append(
-                {
-                    "_source_id": project.get("id"),
-                    "name": project.get("attributes.name"),
-                    # Will be set to True in _mark_spaces_for_terraform_custom_workflow(), if needed
-                    "requires_terraform_workflow_tool": False,
-                }
-            )
+        # Organizations and projects both map to spaces
+        data = [
+            {
+                "_source_id": entity.get("id"),
+                "name": entity.get("attributes.name"),
+                # Will be set to True in _mark_spaces_for_terraform_custom_workflow(), if needed
+                "requires_terraform_workflow_tool": False,
+            }
+            for entity_type in ["organizations", "projects"]
+            for entity in src_data.get(entity_type)
+        ]
 
         logging.info("Stop mapping spaces data")
 
         return data
 
     def _map_stack_variables_data(self, src_data: dict) -> dict:
-        def find_workspace(data: dict, workspace_id: str) -> dict:
-            for workspace in data.get("workspaces"):
-                if workspace.get("id") == workspace_id:
-                    return workspace
+        def find_workspace(workspaces_by_id: dict, workspace_id: str) -> dict:
+            workspace = workspaces_by_id.get(workspace_id)
+            if workspace is None:
+                logging.warning(f"Could not find workspace '{workspace_id}'")
 
-            logging.warning(f"Could not find workspace '{workspace_id}'")
-
-            return None
+            return workspace
 
         logging.info("Start mapping stack variables data")
 
+        workspaces_by_id = {}
+        for workspace in src_data.get("workspaces"):
+            workspaces_by_id.setdefault(workspace.get("id"), workspace)
+
+        # The space only depends on the workspace, so it is determined once per workspace
+        space_ids_by_workspace_id = {}
+
         auto_fix_variable_names = self._config.get("auto_fix_variable_names", False)
-        prog = re.compile("^[a-zA-Z_]+[a-zA-Z0-9_]*$")
         data = []
         for variable in src_data.get("workspace_variables"):
-            workspace = find_workspace(data=src_data, workspace_id=variable.get("relationships.workspace.data.id"))
-
-            is_name_valid = True
+            variable_data = _as_dict(variable)
+            attributes = variable_data.get("attributes") or {}
+            workspace_id = variable.get("relationships.workspace.data.id")
 
-            if re.search(prog, variable.get("attributes.key")) is None:
-                is_name_valid = False
+            if workspace_id not in space_ids_by_workspace_id:
+                workspace = find_workspace(workspaces_by_id=workspaces_by_id, workspace_id=workspace_id)
+                if "relationships.project.data.id" in workspace:
+                    space_ids_by_workspace_id[workspace_id] = workspace.get("relationships.project.data.id")
+                else:
+                    space_ids_by_workspace_id[workspace_id] = workspace.get("relationships.organization.data.id")
 
-            if "relationships.project.data.id" in workspace:
-                space_id = workspace.get("relationships.project.data.id")
-            else:
-                space_id = workspace.get("relationships.organization.data.id")
+            key = attributes.get("key")
+            is_name_valid = _is_valid_variable_name(key)
 
             data.append(
                 {
                     "_relationships": {
-                        "space": space_id,
-                        "stack": variable.get("relationships.workspace.data.id"),
+                        "space": space_ids_by_workspace_id[workspace_id],
+                        "stack": workspace_id,
                     },
-                    "_source_id": variable.get("id"),
-                    "description": variable.get("attributes.description"),
-                    "hcl": variable.get("attributes.hcl"),
-                    "name": variable.get("attributes.key"),
-                    "replacement_name" : variable.get("attributes.key").replace("-", "_") if auto_fix_variable_names and not is_name_valid  else variable.get("attributes.key"),
-                    "type": "terraform" if variable.get("attributes.category") == "terraform" else "env_var",
+                    "_source_id": variable_data.get("id"),
+                    "description": attributes.get("description"),
+                    "hcl": attributes.get("hcl"),
+                    "name": key,
+                    "replacement_name": key.replace("-", "_") if auto_fix_variable_names and not is_name_valid else key,
+                    "type": "terraform" if attributes.get("category") == "terraform" else "env_var",
                     "valid_name": is_name_valid,
-                    "value": variable.get("attributes.value"),
-                    "write_only": variable.get("attributes.sensitive"),
+                    "value": attributes.get("value"),
+                    "write_only": attributes.get("sensitive"),
                 }
             )
 
@@ -1658,8 +2016,22 @@ class TerraformExporter(BaseExporter):
 
         return data
 
+    def _detect_vcs_flavor(self, src_data: dict) -> None:
+        """Detect whether workspaces use GitLab or Azure DevOps, which determines how modules are mapped"""
+        providers = set()
+        for workspace in src_data.get("workspaces"):
+            vcs_repo = (_as_dict(workspace).get("attributes") or {}).get("vcs-repo") or {}
+            if vcs_repo.get("identifier"):
+                providers.add(vcs_repo.get("service-provider"))
+
+        self.is_gitlab = "gitlab_hosted" in providers
+        self.is_ado = "ado_services" in providers
+
     def _determine_provider(self, info: dict) -> dict:
-        provider = info.get("attributes.vcs-repo.service-provider")
+        attributes = _as_dict(info).get("attributes") or {}
+        vcs_repo = attributes.get("vcs-repo") or {}
+        vcs_identifier = vcs_repo.get("identifier")
+        provider = vcs_repo.get("service-provider")
         supported_providers = {
             "github": "github_custom",
             "github_app": "github_custom",
@@ -1671,82 +2043,52 @@ class TerraformExporter(BaseExporter):
 
         if provider is None:
             organization_name = info.get("relationships.organization.data.id")
-            workspace_name = info.get("attributes.name")
+            workspace_name = attributes.get("name")
             logging.warning(f"Workspace '{organization_name}/{workspace_name}' has no VCS configuration")
         elif provider in supported_providers:
             provider = supported_providers[provider]
         else:
             raise ValueError(f"Unknown VCS provider name ({provider})")
 
-        if provider == "gitlab" and info.get("attributes.vcs-repo.identifier"):
-            self.is_gitlab = True
-            segments = info.get("attributes.vcs-repo.identifier").split("/")
-            vcs_namespace = "/".join(segments[:-1])
-            vcs_repository = segments[-1]
-        elif provider == "azure_devops" and info.get("attributes.vcs-repo.identifier"):
-            self.is_ado = True
-            segments = info.get("attributes.vcs-repo.identifier").split("/")
-            vcs_namespace = segments[1]
-            vcs_repository = segments[3]
-        elif provider != "gitlab" and provider != "azure_devops" and info.get("attributes.vcs-repo.identifier"):
-            segments = info.get("attributes.vcs-repo.identifier").split("/")
-            vcs_namespace = segments[0]
-            vcs_repository = segments[1]
-        else:
-            vcs_namespace = None
-            vcs_repository = None
+        vcs_namespace, vcs_repository = _parse_vcs_identifier(vcs_identifier, provider)
 
         return {"vcs_namespace": vcs_namespace, "vcs_repository": vcs_repository, "provider": provider}
 
     def _map_stacks_data(self, src_data: dict) -> dict:
-        def find_workspace_variable_with_invalid_name(data: dict, workspace_id: str, type_: str = "plain") -> dict:
-            prog = re.compile("^[a-zA-Z_]+[a-zA-Z0-9_]*$")
-            variables = []
-
-            for variable in data.get("workspace_variables"):
-                if (variable.get("attributes.sensitive") is True and type_ == "plain") or (
-                    variable.get("attributes.sensitive") is False and type_ == "secret"
-                ):
-                    continue
+        logging.info("Start mapping stacks data")
 
-                if (
-                    variable.get("relationships.workspace.data.id") == workspace_id
-                    and re.search(prog, variable.get("attributes.key")) is None
-                ):
-                    variables.append(variable)
-                    continue
+        # Group the variables with an invalid name by workspace in a single pass.
+        # Variables without a sensitive flag are counted as both plain and secret.
+        invalid_variables_by_workspace_id = defaultdict(lambda: {"plain": [], "secret": []})
+        for variable in src_data.get("workspace_variables"):
+            variable_attributes = _as_dict(variable).get("attributes") or {}
+            if _is_valid_variable_name(variable_attributes.get("key")):
+                continue
 
-            return variables
+            invalid_variables = invalid_variables_by_workspace_id[variable.get("relationships.workspace.data.id")]
+            sensitive = variable_attributes.get("sensitive")
+            if sensitive is not True:
+                invalid_variables["plain"].append(variable)
+            if sensitive is not False:
+                invalid_variables["secret"].append(variable)
 
-        logging.info("Start mapping stacks data")
+        auto_fix_variable_names = self._config.get("auto_fix_variable_names", False)
 
         data = []
         for workspace in src_data.get("workspaces"):
-            variables_with_invalid_name = find_workspace_variable_with_invalid_name(
-                data=src_data, type_="plain", workspace_id=workspace.get("id")
-            )
-            secret_variables_with_invalid_name = find_workspace_variable_with_invalid_name(
-                data=src_data, type_="secret", workspace_id=workspace.get("id")
-            )
-            
-            auto_fix_variable_names = self._config.get("auto_fix_variable_names", False)
+            attributes = _as_dict(workspace).get("attributes") or {}
+            invalid_variables = invalid_variables_by_workspace_id.get(workspace.get("id"), {"plain": [], "secret": []})
+            variables_with_invalid_name = invalid_variables["plain"]
+            secret_variables_with_invalid_name = invalid_variables["secret"]
 
             vcs_info = self._determine_provider(workspace)
             vcs_namespace = vcs_info.get("vcs_namespace")
             vcs_repository = vcs_info.get("vcs_repository")
             provider = vcs_info.get("provider")
 
-            terraform_version = workspace.get("attributes.terraform-version")
-            if terraform_version == "latest":
-                # KLUDGE: Stick to the latest MPL-licensed Terraform version for now
-                terraform_version = "1.5.7"
-                terraform_workflow_tool = "TERRAFORM_FOSS"
-            elif (terraform_version.startswith("~")
-                  or terraform_version.startswith("^")
-                  or semver.match(terraform_version, ">1.5.7")):
-                terraform_workflow_tool = "OPEN_TOFU"
-            else:
-                terraform_workflow_tool = "TERRAFORM_FOSS"
+            terraform_version, terraform_workflow_tool = _classify_terraform_version(
+                attributes.get("terraform-version")
+            )
 
             if "relationships.project.data.id" in workspace:
                 space_id = workspace.get("relationships.project.data.id")
@@ -1758,21 +2100,21 @@ class TerraformExporter(BaseExporter):
                 {
                     "_relationships": {"space": space_id},
                     "_source_id": workspace.get("id"),
-                    "autodeploy": workspace.get("attributes.auto-apply"),
-                    "description": workspace.get("attributes.description"),
+                    "autodeploy": attributes.get("auto-apply"),
+                    "description": attributes.get("description"),
                     "has_variables_with_invalid_name": len(variables_with_invalid_name) > 0 and not auto_fix_variable_names,
                     "has_secret_variables_with_invalid_name": len(secret_variables_with_invalid_name) > 0 and not auto_fix_variable_names,
-                    "name": workspace.get("attributes.name"),
-                    "labels": workspace.get("attributes.tag-names") if workspace.get("attributes.tag-names") is not None else [],
+                    "name": attributes.get("name"),
+                    "labels": attributes.get("tag-names") or [],
                     "slug": self._build_stack_slug(workspace),
                     "terraform": {
                         "version": terraform_version,
                         "workflow_tool": terraform_workflow_tool,
                     },
                     "vcs": {
-                        "branch": workspace.get("attributes.vcs-repo.branch"),
+                        "branch": (attributes.get("vcs-repo") or {}).get("branch"),
                         "namespace": vcs_namespace,
-                        "project_root": workspace.get("attributes.working-directory"),
+                        "project_root": attributes.get("working-directory"),
                         "provider": provider,
                         "repository": vcs_repository,
                     },
@@ -1786,17 +2128,17 @@ class TerraformExporter(BaseExporter):
     def _map_data(self, src_data: dict) -> dict:
         logging.info("Start mapping data")
 
-        data = benedict(
-            {
-                "spaces": self._map_spaces_data(src_data),  # Must be first due to dependency
-                "contexts": [],
-                "context_variables": [],  # Must be after contexts due to dependency
-                # Stacks must be before modules so we can determine is_gitlab so we set VCS properly
-                "stacks": self._map_stacks_data(src_data),
-                "modules": self._map_modules_data(src_data),
-                "stack_variables": self._map_stack_variables_data(src_data),  # Must be after stacks due to dependency
-            }
-        )
+        self._detect_vcs_flavor(src_data)
+
+        # The mapped data has a known structure, so it is kept as plain dicts rather than wrapped for keypaths
+        data = {
+            "spaces": self._map_spaces_data(src_data),  # Must be first due to dependency
+            "contexts": [],
+            "context_variables": [],  # Must be after contexts due to dependency
+            "stacks": self._map_stacks_data(src_data),
+            "modules": self._map_modules_data(src_data),
+            "stack_variables": self._map_stack_variables_data(src_data),  # Must be after stacks due to dependency
+        }
 
         if self.experimental_support_variable_sets:
             data["contexts"] = self._map_contexts_data(src_data)
@@ -1810,24 +2152,26 @@ class TerraformExporter(BaseExporter):
         return data
 
     def _mark_spaces_for_terraform_custom_workflow(self, data: dict) -> dict:
-        def find_space(data: dict, id_: str) -> dict:
-            for space in data.get("spaces"):
-                if space.get("_source_id") == id_:
-                    return space
-
-            logging.warning(f"Could not find space '{id_}'")
+        def find_space(spaces_by_source_id: dict, id_: str) -> dict:
+            space = spaces_by_source_id.get(id_)
+            if space is None:
+                logging.warning(f"Could not find space '{id_}'")
 
-            return None
+            return space
 
         logging.info("Start marking spaces for Terraform custom workflow")
 
+        spaces_by_source_id = {}
+        for space in data.get("spaces"):
+            spaces_by_source_id.setdefault(space.get("_source_id"), space)
+
         for stack in data.get("stacks"):
-            if stack.get("terraform.workflow_tool") == "CUSTOM":
-                space = find_space(data, stack.get("_relationships.space"))
+            if stack["terraform"]["workflow_tool"] == "CUSTOM":
+                space = find_space(spaces_by_source_id, stack["_relationships"]["space"])
                 if space:
                     space["requires_terraform_workflow_tool"] = True
                 else:
-                    logging.warning(f"Could not find space '{stack.get('_relationships.space')}'")
+                    logging.warning(f"Could not find space '{stack['_relationships']['space']}'")
 
         logging.info("Stop marking spaces for Terraform custom workflow")
 
@@ -1850,19 +2194,21 @@ class TerraformExporter(BaseExporter):
             volumes=[("/tmp/spacelift-migration-kit", "/mnt/spacelift-migration-kit")]
         )
 
-        found = False
-        attempts = 0
-        while not found:
-            ps = docker.ps()
-            for container in ps:
-                if container.name == container_name and container.state.running:
-                    logging.info(f"Container Verified Started: {container}")
-                    found = True
-                    break
-            attempts += 1
-            max_attempts = 10
-            if attempts > max_attempts:
-                raise AgentStartError
+        # Inspect the started container with a backoff, rather than listing all containers in a tight loop
+        for delay in (0.1, 0.2, 0.4, 0.8, 1.6, 3.2):
+            try:
+                container.reload()
+            except NoSuchContainer as e:
+                # The container is removed as soon as it stops
+                raise AgentStartError from e
+
+            if container.state.running:
+                logging.info(f"Container Verified Started: {container}")
+                break
+
+            time.sleep(delay)
+        else:
+            raise AgentStartError
 
         logging.debug(f"Using TFC/TFE agent Docker container '{container.id}' from image '{container.config.image}'")
 
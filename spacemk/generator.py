@@ -1,3 +1,4 @@
+import functools
 import json
 import logging
 import os
@@ -6,7 +7,7 @@ from pathlib import Path
 from typing import Optional
 
 import click
-from jinja2 import ChoiceLoader, Environment, FileSystemLoader, StrictUndefined, nodes
+from jinja2 import ChoiceLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined, nodes
 from jinja2.exceptions import TemplateNotFound, TemplateRuntimeError
 from jinja2.ext import Extension
 
@@ -54,7 +55,7 @@ class Generator:
 
         folder_path = get_tmp_subfolder("code")
         process = subprocess.run(
-            f"terraform fmt -no-color {folder_path}", capture_output=True, check=False, shell=True, text=True
+            ["terraform", "fmt", "-no-color", str(folder_path)], capture_output=True, check=False, text=True
         )
 
         if process.returncode != 0:
@@ -62,14 +63,14 @@ class Generator:
         else:
             logging.info("Formatted generated Terraform code")
 
-    def _generate_code(self, data: dict, extra_vars: dict, template_name: str, generation_config: dict):
-        data["extra_vars"] = extra_vars
-        data["generation_config"] = generation_config
-
+    @functools.cached_property
+    def _environment(self) -> Environment:
         current_file_path = Path(__file__).parent.resolve()
 
+        # Compiled templates are cached on disk, so that they are only parsed again when their source changes
         env = Environment(
             autoescape=False,
+            bytecode_cache=FileSystemBytecodeCache(str(get_tmp_subfolder("jinja-cache"))),
             extensions=[RaiseExtension],
             loader=ChoiceLoader(
                 [
@@ -85,39 +86,54 @@ class Generator:
         env.filters["randomsuffix"] = self._filter_randomsuffix
         env.filters["totf"] = self._filter_totf
 
+        return env
+
+    def _generate_code(self, data: dict, extra_vars: dict, template_name: str, generation_config: dict):
+        data["extra_vars"] = extra_vars
+        data["generation_config"] = generation_config
+
+        path = Path(get_tmp_subfolder("code"), "main.tf")
+        tmp_path = path.with_name(f"{path.name}.part")
+
+        # Stream the rendered code to a temporary file, rather than building it in memory first,
+        # and only rename it once rendering succeeded so that a template error never leaves a truncated file behind
         try:
-            content = env.get_template(name=template_name, parent="base.tf.jinja").render(**data)
+            template = self._environment.get_template(name=template_name, parent="base.tf.jinja")
+            with tmp_path.open("w", encoding="utf-8") as fp:
+                stream = template.stream(**data)
+                stream.enable_buffering(size=100)
+                stream.dump(fp)
+            tmp_path.replace(path)
         except TemplateNotFound as e:
             raise FileNotFoundError(f"Template not found '{e.message}'") from e
-
-        self._save_to_file("main.tf", content)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
     def _load_data(self) -> dict:
-        return load_normalized_data()
+        # The loaded data is shared, and _process_data() is free to change it
+        return load_normalized_data().deepcopy()
 
     def _process_data(self, data: dict) -> dict:
         logging.info("No custom data processing defined. Skipping.")
         return data
 
-    def _save_to_file(self, filename: str, content: str):
-        path = Path(get_tmp_subfolder("code"), filename)
-
-        with path.open("w", encoding="utf-8") as fp:
-            fp.write(content)
-
     def _validate_code(self) -> None:
         if not is_command_available("terraform"):
             logging.warning("Terraform is not installed. Skipping generated Terraform code validation.")
             return
 
         path = get_tmp_subfolder("code")
-        process = subprocess.run(
-            f"terraform -chdir={path} init -backend=false -no-color && terraform -chdir={path} validate -no-color",
-            capture_output=True,
-            check=False,
-            shell=True,
-            text=True,
-        )
+
+        # Providers are cached across runs, unless a cache is already configured, as downloading them dominates
+        env = os.environ.copy()
+        env.setdefault("TF_PLUGIN_CACHE_DIR", str(get_tmp_subfolder("terraform-plugin-cache")))
+
+        for args in (["init", "-backend=false", "-no-color"], ["validate", "-no-color"]):
+            process = subprocess.run(
+                ["terraform", f"-chdir={path}", *args], capture_output=True, check=False, env=env, text=True
+            )
+            if process.returncode != 0:
+                break
 
         if process.returncode != 0:
             logging.warning(f"Generated Terraform code is invalid: {process.stderr}")
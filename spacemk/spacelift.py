@@ -1,12 +1,15 @@
 import json
 import logging
 import os
+import threading
 import time
 from base64 import b64encode
 
 import requests
 from benedict import benedict
+from requests.adapters import HTTPAdapter
 from requests_toolbelt.utils import dump as request_dump
+from urllib3.util import Retry
 
 from spacemk import load_normalized_data
 
@@ -20,10 +23,29 @@ class Spacelift:
         """
         self._config = config
         self._api_jwt_token = None
+        self._api_jwt_token_lock = threading.Lock()
+
+        # Retry on rate limiting, which is more likely when calling the API concurrently, and on connection errors.
+        # Mutations are not idempotent, so only retry when the request was never processed:
+        # neither on read errors nor on gateway errors, as the server may have already applied the mutation.
+        retry = Retry(
+            allowed_methods=["POST"],
+            backoff_factor=0.5,
+            connect=5,
+            other=0,
+            raise_on_status=False,
+            read=0,
+            respect_retry_after_header=True,
+            status_forcelist=[429],
+            total=5,
+        )
+        self._session = requests.Session()
+        self._session.mount("http://", HTTPAdapter(max_retries=retry))
+        self._session.mount("https://", HTTPAdapter(max_retries=retry))
 
     def call_api(self, operation: str, variables: dict | None = None) -> dict:
         try:
-            response = requests.post(
+            response = self._session.post(
                 headers={"Authorization": f"Bearer {self._get_api_jwt_token()}"},
                 json={"query": operation, "variables": variables},
                 url=self._config.get("api.api_key_endpoint"),
@@ -41,34 +63,39 @@ class Spacelift:
         return data
 
     def _get_api_jwt_token(self) -> str:
-        if not self._api_jwt_token:
-            query = """
-              mutation GetSpaceliftToken($apiKeyId: ID!, $apiKeySecret: String!) {
-                apiKeyUser(id: $apiKeyId, secret: $apiKeySecret) {
-                  jwt
-                }
-              }
-            """
-            payload = {
-                "query": query,
-                "variables": {
-                    "apiKeyId": self._config.get("api.api_key_id"),
-                    "apiKeySecret": self._config.get("api.api_key_secret"),
-                },
-            }
+        # The API may be called from several threads, make sure the token is only requested once
+        with self._api_jwt_token_lock:
+            if not self._api_jwt_token:
+                self._api_jwt_token = self._request_api_jwt_token()
 
-            response = requests.post(
-                json=payload,
-                url=self._config.get("api.api_key_endpoint"),
-            )
-            data = benedict(response.json())
+        return self._api_jwt_token
 
-            if "errors" in data:
-                raise RuntimeError(f"Spacelift API Error: {data.get('errors[0].message')}")
+    def _request_api_jwt_token(self) -> str:
+        query = """
+          mutation GetSpaceliftToken($apiKeyId: ID!, $apiKeySecret: String!) {
+            apiKeyUser(id: $apiKeyId, secret: $apiKeySecret) {
+              jwt
+            }
+          }
+        """
+        payload = {
+            "query": query,
+            "variables": {
+                "apiKeyId": self._config.get("api.api_key_id"),
+                "apiKeySecret": self._config.get("api.api_key_secret"),
+            },
+        }
 
-            self._api_jwt_token = data.get("data.apiKeyUser.jwt")
+        response = self._session.post(
+            json=payload,
+            url=self._config.get("api.api_key_endpoint"),
+        )
+        data = benedict(response.json())
 
-        return self._api_jwt_token
+        if "errors" in data:
+            raise RuntimeError(f"Spacelift API Error: {data.get('errors[0].message')}")
+
+        return data.get("data.apiKeyUser.jwt")
 
     def _get_sensitive_env_vars(self) -> list[dict]:
         env_vars = []